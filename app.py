@@ -1,9 +1,5 @@
 import streamlit as st
-import pandas as pd
-from utils.data_manager import load_data
-import os
-from PIL import Image
-import io
+from utils.data_manager import get_inventory_stats
 
 st.set_page_config(
     page_title="Sistema de Inventario y POS",
@@ -19,7 +15,19 @@ st.set_page_config(
 
 # Cargar y mostrar el logo
 logo_path = "assets/logo.png"
-if os.path.exists(logo_path):
+
+# Firmas de los formatos de imagen aceptados para el logo
+IMAGE_SIGNATURES = (b'\x89PNG\r\n\x1a\n', b'\xff\xd8\xff')
+
+def es_imagen(path):
+    """Verifica la firma del archivo sin cargar PIL (st.image lo importa al usarse)"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(8).startswith(IMAGE_SIGNATURES)
+    except OSError:
+        return False
+
+if es_imagen(logo_path):
     try:
         st.sidebar.image(logo_path, width=200, caption="Variedades Juancho View")
     except Exception as e:
@@ -57,10 +65,10 @@ def main():
     with col1:
         st.subheader("📊 Resumen de Inventario")
         try:
-            df = load_data()
-            if df is not None:
-                st.metric("Total de Productos", len(df))
-                st.metric("Valor del Inventario", f"${df['precio'].sum():,.2f}")
+            stats = get_inventory_stats()
+            if stats is not None:
+                st.metric("Total de Productos", stats['total_productos'])
+                st.metric("Valor del Inventario", f"${stats['valor_inventario']:,.2f}")
         except Exception as e:
             st.error("Error al cargar datos del inventario")
 
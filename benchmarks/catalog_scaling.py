@@ -0,0 +1,245 @@
+"""
+Mide cómo escalan la importación, la carga y las consultas de las páginas
+con catálogos sintéticos en el formato del ERP (nombre, refer, codigo,
+q_fin, pvta1i, además de linea y nomb_marca).
+
+Por cada tamaño se guarda el tiempo (mejor de varias repeticiones) y el
+pico de memoria de Python (tracemalloc) de cada paso, en un archivo JSON
+para comparar resultados entre commits:
+
+    python -m benchmarks.catalog_scaling --filas 10000 100000 1000000 --salida resultados.json
+    python -m benchmarks.catalog_scaling --filas 10000 --comparar resultados.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils import data_manager
+from utils.db import close_connections
+from utils.discounts import get_discount_table
+from utils.search import get_price_index, get_search_index
+
+# El Excel se genera con openpyxl, que es lento: por defecto solo hasta este tamaño
+EXCEL_MAX_ROWS = 100000
+
+# Consultas de productos similares por repetición (una por producto seleccionado)
+SIMILAR_QUERIES = 100
+
+PALABRAS = [
+    'ACCESORIO', 'BICICLETA', 'INFLADOR', 'CADENA', 'PEDAL', 'MANUBRIO', 'LLANTA', 'NEUMATICO',
+    'FRENO', 'CASCO', 'GUANTE', 'LUZ', 'SILLIN', 'RIN', 'RADIO', 'TUBO', 'PIÑON', 'CARTER'
+]
+ORIGENES = ['CHINA', 'TAIWAN', 'COLOMBIA', 'BRASIL', 'INDIA']
+MARCAS = ['PRINCIPAL', 'SHIMANO', 'GW', 'OPTIMUS', 'VENZO', 'SRAM', 'KENDA', 'CST']
+
+def generate_catalog(filas, seed=0):
+    """Catálogo sintético con las columnas y la distribución aproximada del ERP"""
+    rng = np.random.default_rng(seed)
+    palabras = np.array(PALABRAS)
+    modelos = rng.integers(1, 999, filas).astype(str)
+    origenes = np.array(ORIGENES)[rng.integers(0, len(ORIGENES), filas)]
+    nombres = (
+        pd.Series(palabras[rng.integers(0, len(PALABRAS), filas)])
+        + ' ' + palabras[rng.integers(0, len(PALABRAS), filas)]
+        + ' ' + modelos + ' ' + origenes
+    )
+    referencias = pd.Series(modelos) + ' ' + origenes
+    # Cantidades sesgadas hacia pocas unidades y precios redondeados a centenas
+    cantidades = np.where(rng.random(filas) < 0.15, 0, rng.geometric(0.08, filas))
+    precios = (np.round(rng.lognormal(10, 1.2, filas), -2)).astype(np.int64) + 100
+    return pd.DataFrame({
+        'linea': rng.integers(1, 40, filas).astype(str),
+        'nombre': nombres,
+        'refer': referencias,
+        'codigo': [f'{i:06d}' for i in range(1, filas + 1)],
+        'q_fin': cantidades,
+        'nomb_marca': np.array(MARCAS)[rng.integers(0, len(MARCAS), filas)],
+        'pvta1i': precios
+    })
+
+class NamedFile:
+    """Archivo abierto con el nombre original, como el que entrega st.file_uploader"""
+
+    def __init__(self, path):
+        self.name = os.path.basename(path)
+        self._file = open(path, 'rb')
+
+    def __getattr__(self, attr):
+        return getattr(self._file, attr)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._file.close()
+
+def _reset_snapshot(arrow=False):
+    """Olvida la copia en memoria (y opcionalmente la copia Arrow) para medir una carga en frío"""
+    data_manager._snapshot['version'] = None
+    data_manager._snapshot['df'] = None
+    data_manager._derived.clear()
+    if not arrow and os.path.exists(data_manager._arrow_path()):
+        os.remove(data_manager._arrow_path())
+
+def measure(step, repeticiones, memoria, setup=None):
+    """Mejor tiempo de step() en varias repeticiones y, si se pide, su pico de memoria"""
+    tiempos = []
+    for _ in range(repeticiones):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        step()
+        tiempos.append(time.perf_counter() - start)
+
+    resultado = {'segundos': min(tiempos), 'mediana': float(np.median(tiempos))}
+    if memoria:
+        if setup is not None:
+            setup()
+        tracemalloc.start()
+        try:
+            step()
+            resultado['pico_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return resultado
+
+def _import(path):
+    def step():
+        with NamedFile(path) as f:
+            data_manager.import_file(f, mode='replace')
+    return step
+
+def run_size(filas, tmp, repeticiones, memoria, excel_max):
+    catalogo = generate_catalog(filas)
+    csv_path = os.path.join(tmp, f'catalogo_{filas}.csv')
+    catalogo.to_csv(csv_path, sep=';', index=False)
+
+    data_manager.DB_PATH = os.path.join(tmp, f'inventory_{filas}.db')
+    data_manager.initialize_database()
+
+    pasos = {}
+    # La importación es lenta con catálogos grandes: una sola repetición
+    pasos['importar_csv'] = measure(_import(csv_path), 1, memoria)
+    if filas <= excel_max:
+        xlsx_path = os.path.join(tmp, f'catalogo_{filas}.xlsx')
+        catalogo.to_excel(xlsx_path, index=False)
+        pasos['importar_excel'] = measure(_import(xlsx_path), 1, memoria)
+    else:
+        pasos['importar_excel'] = None
+    del catalogo
+
+    pasos['cargar_sqlite'] = measure(data_manager.load_data, repeticiones, memoria, setup=_reset_snapshot)
+    pasos['cargar_arrow'] = measure(
+        data_manager.load_data, repeticiones, memoria, setup=lambda: _reset_snapshot(arrow=True)
+    )
+    pasos['cargar_en_memoria'] = measure(data_manager.load_data, repeticiones, memoria)
+
+    df = data_manager.load_data()
+    precio_min, precio_max = df['precio'].quantile([0.25, 0.75])
+
+    # Filtros de la página Inventario: búsqueda, rango de precio y disponibles
+    def filtrar():
+        mask = get_search_index(df).mask('CADENA 12')
+        mask = mask & (df['cantidad'] > 0) & (df['precio'] >= precio_min) & (df['precio'] <= precio_max)
+        return df[mask]
+
+    pasos['filtro_inventario_indice'] = measure(
+        lambda: get_search_index(df), 1, memoria, setup=data_manager._derived.clear
+    )
+    pasos['filtro_inventario'] = measure(filtrar, repeticiones, memoria)
+
+    pasos['tabla_descuentos'] = measure(
+        lambda: get_discount_table(df), repeticiones, memoria, setup=data_manager._derived.clear
+    )
+
+    # Productos similares (±20% del precio, misma línea) de varios productos seleccionados
+    seleccion = df.sample(min(SIMILAR_QUERIES, len(df)), random_state=0)[['precio', 'linea']].to_numpy()
+
+    def similares():
+        price_index = get_price_index(df)
+        for precio, linea in seleccion:
+            df.iloc[price_index.band(precio * 0.8, precio * 1.2, columna='linea', valor=linea)]
+
+    pasos['productos_similares_indice'] = measure(
+        lambda: get_price_index(df), 1, memoria, setup=data_manager._derived.clear
+    )
+    pasos['productos_similares'] = measure(similares, repeticiones, memoria)
+
+    return {'filas': filas, 'pasos': pasos}
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def compare(actual, previo):
+    """Imprime la razón entre los tiempos actuales y los de un resultado anterior"""
+    anteriores = {r['filas']: r['pasos'] for r in previo['resultados']}
+    for resultado in actual['resultados']:
+        pasos_previos = anteriores.get(resultado['filas'])
+        if pasos_previos is None:
+            continue
+        print(f"\n{resultado['filas']:,} filas (vs {previo.get('commit') or 'anterior'}):")
+        for paso, medida in resultado['pasos'].items():
+            anterior = pasos_previos.get(paso)
+            if medida is None or anterior is None:
+                continue
+            razon = medida['segundos'] / anterior['segundos'] if anterior['segundos'] else float('inf')
+            print(f"  {paso:28s} {anterior['segundos']:9.4f} s -> {medida['segundos']:9.4f} s  x{razon:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--excel-max', type=int, default=EXCEL_MAX_ROWS,
+                        help="tamaño máximo para medir la importación de Excel")
+    parser.add_argument('--sin-memoria', action='store_true', help="no medir el pico de memoria")
+    parser.add_argument('--salida', help="archivo JSON con los resultados")
+    parser.add_argument('--comparar', help="archivo JSON de una ejecución anterior")
+    args = parser.parse_args()
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for filas in args.filas:
+            resultado = run_size(filas, tmp, args.repeticiones, not args.sin_memoria, args.excel_max)
+            resultados.append(resultado)
+            print(f"{filas:,} filas:")
+            for paso, medida in resultado['pasos'].items():
+                if medida is None:
+                    print(f"  {paso:28s} (omitido)")
+                    continue
+                pico = medida.get('pico_bytes')
+                memoria = f"  pico {pico / 2**20:8.1f} MB" if pico is not None else ''
+                print(f"  {paso:28s} {medida['segundos']:9.4f} s{memoria}")
+            close_connections()
+
+    salida = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'resultados': resultados
+    }
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(salida, f, indent=2)
+    if args.comparar:
+        with open(args.comparar) as f:
+            compare(salida, json.load(f))
+
+if __name__ == "__main__":
+    main()
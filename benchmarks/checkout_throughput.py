@@ -0,0 +1,76 @@
+"""
+Mide cuántas ventas por segundo soporta checkout con varios cajeros a la vez.
+
+Trabaja sobre una copia de la base de datos para no modificar el inventario:
+
+    python -m benchmarks.checkout_throughput --db inventory.db --cajeros 1 2 4 8
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from utils import data_manager
+
+def run(cajeros, ventas_por_cajero, codigos):
+    resultados = {'exito': 0, 'fallidas': 0}
+    lock = threading.Lock()
+
+    def cajero(numero):
+        for i in range(ventas_por_cajero):
+            codigo = codigos[(numero * 7 + i) % len(codigos)]
+            resultado = data_manager.checkout([{'codigo': codigo, 'cantidad': 1}])
+            with lock:
+                resultados['exito' if resultado['exito'] else 'fallidas'] += 1
+
+    threads = [threading.Thread(target=cajero, args=(n,)) for n in range(cajeros)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'cajeros': cajeros,
+        'ventas': resultados['exito'],
+        'fallidas': resultados['fallidas'],
+        'segundos': elapsed,
+        'ventas_por_segundo': resultados['exito'] / elapsed if elapsed else 0.0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=data_manager.DB_PATH)
+    parser.add_argument('--cajeros', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--ventas', type=int, default=200, help="ventas por cajero")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_manager.DB_PATH = os.path.join(tmp, 'inventory.db')
+        shutil.copy(args.db, data_manager.DB_PATH)
+        data_manager.initialize_database()
+
+        df = data_manager.load_data()
+        codigos = df.loc[df['cantidad'] >= max(args.cajeros) * args.ventas, 'codigo'].tolist()
+        if not codigos:
+            # Sin productos con stock suficiente: darles stock a los primeros de la copia
+            codigos = df['codigo'].head(100).tolist()
+            conn = data_manager.get_connection(data_manager.DB_PATH)
+            conn.executemany(
+                'UPDATE inventory SET cantidad = ? WHERE codigo = ?',
+                [(max(args.cajeros) * args.ventas * len(args.cajeros), codigo) for codigo in codigos]
+            )
+            conn.commit()
+
+        for cajeros in args.cajeros:
+            resultado = run(cajeros, args.ventas, codigos)
+            print(
+                f"{resultado['cajeros']} cajeros: {resultado['ventas_por_segundo']:,.0f} ventas/s "
+                f"({resultado['ventas']} ventas, {resultado['fallidas']} fallidas, {resultado['segundos']:.2f} s)"
+            )
+
+if __name__ == "__main__":
+    main()
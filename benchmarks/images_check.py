@@ -0,0 +1,186 @@
+"""
+Verifica el servicio de imágenes (utils/images.py) contra un servidor HTTP
+local que responde con retardo: las descargas son simultáneas, las vistas
+repetidas no hacen peticiones, las cachés en memoria y en disco respetan su
+límite descartando las menos usadas y las imágenes lentas o inexistentes
+retornan None sin bloquear la página.
+
+    python -m benchmarks.images_check
+    python -m benchmarks.images_check --retardo 0.5 --imagenes 6
+
+Termina con código 1 si alguna verificación falla.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+from utils import images
+
+class StubServer:
+    """Servidor de imágenes PNG que cuenta las peticiones y las simultáneas"""
+
+    def __init__(self, retardo):
+        self.retardo = retardo
+        self.peticiones = 0
+        self.en_curso = 0
+        self.max_en_curso = 0
+        self._lock = threading.Lock()
+        self._png = _png()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.peticiones += 1
+                    stub.en_curso += 1
+                    stub.max_en_curso = max(stub.max_en_curso, stub.en_curso)
+                try:
+                    if self.path.startswith('/faltante'):
+                        self.send_error(404)
+                        return
+                    time.sleep(stub.retardo * (10 if self.path.startswith('/lenta') else 1))
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'image/png')
+                    self.send_header('Content-Length', str(len(stub._png)))
+                    self.end_headers()
+                    self.wfile.write(stub._png)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with stub._lock:
+                        stub.en_curso -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, path):
+        return f'http://127.0.0.1:{self.server.server_port}/{path}'
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def _png():
+    from PIL import Image
+
+    output = BytesIO()
+    Image.new('RGB', (800, 600), (200, 120, 40)).save(output, format='PNG')
+    return output.getvalue()
+
+def _reset_cache(cache_dir, memoria, disco):
+    images.CACHE_DIR = cache_dir
+    images.MEMORY_CACHE_SIZE = memoria
+    images.DISK_CACHE_SIZE = disco
+    with images._lock:
+        images._memory_cache.clear()
+
+def run_checks(stub, cantidad, retardo, cache_dir):
+    """Ejecuta las verificaciones; retorna una lista de (nombre, ok, detalle)"""
+    resultados = []
+
+    def check(nombre, ok, detalle):
+        resultados.append((nombre, bool(ok), detalle))
+
+    urls = [stub.url(f'imagen/{i}.png') for i in range(cantidad)]
+    _reset_cache(cache_dir, memoria=cantidad, disco=cantidad * 4)
+
+    # Primera vista: descargas simultáneas, muy por debajo de la suma de los retardos
+    start = time.perf_counter()
+    datos = images.fetch_images(urls)
+    elapsed = time.perf_counter() - start
+    secuencial = retardo * cantidad
+    check(
+        "descargas simultáneas",
+        all(datos) and stub.max_en_curso > 1 and elapsed < secuencial / 2,
+        f"{elapsed:.2f} s ({secuencial:.2f} s una tras otra), {stub.max_en_curso} a la vez"
+    )
+
+    # Vista repetida: todo sale de la caché en memoria
+    antes = stub.peticiones
+    start = time.perf_counter()
+    repetidas = images.fetch_images(urls)
+    elapsed = time.perf_counter() - start
+    check(
+        "vista repetida sin red",
+        repetidas == datos and stub.peticiones == antes,
+        f"{stub.peticiones - antes} peticiones, {elapsed * 1000:.1f} ms"
+    )
+
+    # Proceso nuevo (caché en memoria vacía): las miniaturas salen del disco
+    _reset_cache(cache_dir, memoria=cantidad, disco=cantidad * 4)
+    antes = stub.peticiones
+    desde_disco = images.fetch_images(urls)
+    check(
+        "caché en disco",
+        desde_disco == datos and stub.peticiones == antes,
+        f"{stub.peticiones - antes} peticiones después de vaciar la memoria"
+    )
+
+    # LRU en memoria: con espacio para la mitad, se conservan las más recientes
+    limite = max(cantidad // 2, 1)
+    _reset_cache(cache_dir, memoria=limite, disco=cantidad * 4)
+    images.fetch_images(urls)
+    images.fetch_image(urls[0])  # la primera vuelve a ser la más reciente
+    en_memoria = list(images._memory_cache)
+    check(
+        "LRU en memoria",
+        len(en_memoria) == limite and en_memoria[-1] == urls[0] and urls[1] not in en_memoria,
+        f"{len(en_memoria)} de {cantidad} en memoria (límite {limite})"
+    )
+
+    # LRU en disco: al superar el límite se borran las miniaturas menos usadas
+    _reset_cache(cache_dir, memoria=cantidad, disco=cantidad)
+    nuevas = [stub.url(f'otra/{i}.png') for i in range(cantidad)]
+    images.fetch_images(nuevas)
+    en_disco = len(os.listdir(cache_dir))
+    check("LRU en disco", en_disco <= cantidad, f"{en_disco} archivos (límite {cantidad})")
+
+    # Imagen lenta: se abandona al vencer el tiempo de espera
+    timeout = retardo * 2
+    start = time.perf_counter()
+    lenta = images.fetch_image(stub.url('lenta.png'), timeout=timeout)
+    elapsed = time.perf_counter() - start
+    check("tiempo de espera", lenta is None and elapsed < timeout * 3, f"None en {elapsed:.2f} s (límite {timeout:.2f} s)")
+
+    # Imagen inexistente: None y no se guarda en caché
+    faltante = stub.url('faltante.png')
+    check(
+        "imagen inexistente",
+        images.fetch_image(faltante) is None and images._from_cache(faltante) is None,
+        "404 retorna None"
+    )
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--retardo', type=float, default=0.3, help="segundos de cada respuesta del servidor")
+    parser.add_argument('--imagenes', type=int, default=images.MAX_WORKERS)
+    args = parser.parse_args()
+    if args.imagenes < 2:
+        parser.error("se necesitan al menos 2 imágenes para verificar las descargas simultáneas")
+
+    stub = StubServer(args.retardo)
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            resultados = run_checks(stub, args.imagenes, args.retardo, cache_dir)
+    finally:
+        stub.close()
+
+    fallas = 0
+    for nombre, ok, detalle in resultados:
+        fallas += not ok
+        print(f"  {nombre:25s} {'ok' if ok else 'FALLA'}  ({detalle})")
+    sys.exit(1 if fallas else 0)
+
+if __name__ == "__main__":
+    main()
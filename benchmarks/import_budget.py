@@ -0,0 +1,91 @@
+"""
+Verifica el tiempo de arranque de cada página: en un proceso nuevo, con
+Streamlit y pandas ya importados (incluida la tabla de emojis que carga
+set_page_config, común a todas las páginas), ejecuta el nivel superior del script
+(importaciones y set_page_config, sin main) y falla si tarda más que el
+presupuesto o si carga alguna dependencia que solo deben usar funciones
+puntuales (SQLAlchemy, PIL, requests, lectores de Excel, el perfilador).
+
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --presupuesto-ms 50 app.py pages/1_Inventario.py
+
+Termina con código 1 si alguna página excede el presupuesto.
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milisegundos permitidos para el nivel superior de cada página
+BUDGET_MS = 100
+
+# Módulos que no deben cargarse solo por abrir una página
+LAZY_MODULES = ['sqlalchemy', 'PIL', 'requests', 'openpyxl', 'xlrd', 'cProfile', 'concurrent.futures.process']
+
+# Ejecuciones por página: se toma la más rápida para reducir el ruido
+RUNS = 5
+
+_PROBE = '''
+import json, logging, runpy, sys, time
+logging.disable(logging.CRITICAL)
+start = time.perf_counter()
+import pandas, streamlit, streamlit.emojis
+base = time.perf_counter() - start
+start = time.perf_counter()
+if sys.argv[1]:
+    runpy.run_path(sys.argv[1], run_name="__import_budget__")
+elapsed = time.perf_counter() - start
+print(json.dumps({"base": base, "segundos": elapsed, "modulos": sorted(set(sys.modules) & set(json.loads(sys.argv[2])))}))
+'''
+
+def probe(script):
+    """
+    Tiempo del nivel superior de la página con Streamlit y pandas ya
+    importados (mejor de RUNS procesos nuevos) y módulos perezosos cargados
+    """
+    mejor = None
+    for _ in range(RUNS):
+        salida = subprocess.run(
+            [sys.executable, '-c', _PROBE, script, json.dumps(LAZY_MODULES)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+            env=dict(os.environ, PYTHONPATH=ROOT)
+        ).stdout
+        resultado = json.loads(salida.strip().splitlines()[-1])
+        if mejor is None or resultado['segundos'] < mejor['segundos']:
+            mejor = resultado
+    return mejor
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scripts', nargs='*', help="páginas a verificar (por defecto app.py y pages/)")
+    parser.add_argument('--presupuesto-ms', type=float, default=BUDGET_MS)
+    args = parser.parse_args()
+
+    scripts = args.scripts or ['app.py'] + sorted(
+        os.path.relpath(path, ROOT) for path in glob.glob(os.path.join(ROOT, 'pages', '*.py'))
+    )
+
+    base = probe('')['base']
+    print(f"Base (streamlit, pandas y emojis): {base * 1000:.0f} ms, presupuesto por página: {args.presupuesto_ms:.0f} ms")
+
+    fallas = 0
+    for script in scripts:
+        resultado = probe(script)
+        extra = resultado['segundos'] * 1000
+        problemas = []
+        if extra > args.presupuesto_ms:
+            problemas.append(f"excede el presupuesto por {extra - args.presupuesto_ms:.0f} ms")
+        if resultado['modulos']:
+            problemas.append(f"carga {', '.join(resultado['modulos'])}")
+        fallas += bool(problemas)
+        estado = 'FALLA: ' + '; '.join(problemas) if problemas else 'ok'
+        print(f"  {script:40s} +{extra:5.0f} ms  {estado}")
+
+    sys.exit(1 if fallas else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Simula varias sesiones de Streamlit a la vez para estimar cuántos usuarios
+(cajeros) atiende un contenedor. Cada sesión es un AppTest que repite un
+guion de interacciones sobre una página: inicio (app.py), Inventario
+(buscar, cambiar el rango de precio, ocultar agotados) o Descuentos
+(elegir un producto, mover el descuento y analizarlo). Opcionalmente una
+sesión más importa el catálogo en segundo plano mientras tanto.
+
+Por cada cantidad de sesiones se reportan los percentiles de latencia de
+cada ejecución de la página, las ejecuciones por segundo y la memoria
+residente. Cada sesión corre en su propio proceso (AppTest no admite
+ejecuciones simultáneas en un mismo proceso), así que la memoria es la
+suma de todos y, a diferencia del servidor de Streamlit, las sesiones no
+comparten el GIL ni la copia en memoria del inventario: las latencias son
+una cota optimista, útil para comparar entre commits. Trabaja sobre una
+copia de la base de datos:
+
+    python -m benchmarks.load_sessions --db inventory.db --sesiones 1 2 4 8 --duracion 20
+    python -m benchmarks.load_sessions --sesiones 4 --importar catalogo.csv --salida carga.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+from utils import data_manager, jobs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = {
+    'inicio': 'app.py',
+    'inventario': os.path.join('pages', '1_Inventario.py'),
+    'descuentos': os.path.join('pages', '7_Calculadora_Descuentos.py'),
+    'configuracion': os.path.join('pages', '3_Configuracion.py')
+}
+
+# Tiempo máximo de una ejecución de página antes de darla por fallida
+RUN_TIMEOUT = 120
+
+def rss_bytes():
+    """Memoria residente actual del proceso (el pico si /proc no está disponible)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return _rss_pico()
+
+def _timed(at, latencias):
+    start = time.perf_counter()
+    at.run(timeout=RUN_TIMEOUT)
+    latencias.append(time.perf_counter() - start)
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+def guion_inicio(at, rng, terminos, latencias):
+    _timed(at, latencias)
+
+def guion_inventario(at, rng, terminos, latencias):
+    _timed(at, latencias)
+    at.text_input[0].input(rng.choice(terminos))
+    _timed(at, latencias)
+    at.number_input[0].set_value(float(rng.choice([0, 5000, 20000])))
+    _timed(at, latencias)
+    at.checkbox[0].check()
+    _timed(at, latencias)
+    at.text_input[0].input('')
+    at.checkbox[0].uncheck()
+    _timed(at, latencias)
+
+def guion_descuentos(at, rng, terminos, latencias):
+    _timed(at, latencias)
+    at.checkbox[0].check()
+    _timed(at, latencias)
+    at.text_input[0].input(rng.choice(terminos))
+    _timed(at, latencias)
+    at.slider[0].set_value(rng.randint(0, 50))
+    _timed(at, latencias)
+    for button in at.button:
+        if 'Analizar' in button.label:
+            button.click()
+    _timed(at, latencias)
+
+GUIONES = {
+    'inicio': guion_inicio,
+    'inventario': guion_inventario,
+    'descuentos': guion_descuentos
+}
+
+def _sesion(pagina, duracion, terminos, seed, inicio):
+    rng = random.Random(seed)
+    guion = GUIONES[pagina]
+    latencias, errores = [], []
+    inicio.wait()
+    fin = time.perf_counter() + duracion
+    while time.perf_counter() < fin:
+        # Cada repetición del guion es una sesión nueva del navegador
+        at = AppTest.from_file(os.path.join(ROOT, PAGES[pagina]), default_timeout=RUN_TIMEOUT)
+        try:
+            guion(at, rng, terminos, latencias)
+        except Exception as e:
+            errores.append(f"{pagina}: {str(e)}")
+    return latencias, errores
+
+def _sesion_importacion(path, duracion, inicio):
+    """Importa el archivo (como desde Configuración) y sigue la página hasta que termina"""
+    latencias, errores = [], []
+    inicio.wait()
+    fin = time.perf_counter() + duracion
+    while time.perf_counter() < fin:
+        # st.file_uploader no se puede manejar desde AppTest: se encola el
+        # archivo igual que lo hace la página y luego se consulta su avance
+        with open(path, 'rb') as f:
+            job_id = jobs.submit_import(os.path.basename(path), f.read(), mode='upsert')
+        at = AppTest.from_file(os.path.join(ROOT, PAGES['configuracion']), default_timeout=RUN_TIMEOUT)
+        at.session_state['import_job'] = job_id
+        try:
+            while True:
+                _timed(at, latencias)
+                job = jobs.get_job(job_id)
+                if job['estado'] not in ('pendiente', 'en_proceso'):
+                    if job['estado'] == 'fallido':
+                        errores.append(f"importación: {job['error']}")
+                    break
+                time.sleep(0.5)
+        except Exception as e:
+            errores.append(f"importación: {str(e)}")
+    return latencias, errores
+
+def _proceso(nombre, db_path, upload_dir, inicio, resultados, target, *args):
+    """Ejecuta una sesión en un proceso propio y envía sus mediciones al proceso principal"""
+    data_manager.DB_PATH = db_path
+    jobs.UPLOAD_DIR = upload_dir
+    os.chdir(ROOT)
+    try:
+        latencias, errores = target(*args, inicio)
+    except Exception as e:
+        latencias, errores = [], [f"{nombre}: {str(e)}"]
+    resultados.put((nombre, latencias, errores, rss_bytes(), _rss_pico()))
+
+def _rss_pico():
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    escala = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * escala
+
+def run(sesiones, paginas, duracion, terminos, importar=None):
+    """
+    Lanza las sesiones en procesos separados: AppTest reemplaza el runtime
+    global de Streamlit en cada ejecución, así que dos AppTest no pueden
+    ejecutarse a la vez en el mismo proceso.
+    """
+    ctx = multiprocessing.get_context('spawn')
+    tareas = [
+        (paginas[n % len(paginas)], _sesion, paginas[n % len(paginas)], duracion, terminos, n)
+        for n in range(sesiones)
+    ]
+    if importar:
+        tareas.append(('importacion', _sesion_importacion, importar, duracion))
+
+    inicio = ctx.Barrier(len(tareas) + 1)
+    resultados = ctx.Queue()
+    procesos = [
+        ctx.Process(
+            target=_proceso,
+            args=(nombre, data_manager.DB_PATH, jobs.UPLOAD_DIR, inicio, resultados, target, *args)
+        )
+        for nombre, target, *args in tareas
+    ]
+    for proceso in procesos:
+        proceso.start()
+    # Medir desde que todas las sesiones terminaron de importar Streamlit
+    inicio.wait()
+    start = time.perf_counter()
+
+    latencias = {}
+    errores = []
+    rss_final = rss_pico = 0
+    for _ in procesos:
+        nombre, valores, errores_sesion, rss, pico = resultados.get()
+        latencias.setdefault(nombre, []).extend(valores)
+        errores.extend(errores_sesion)
+        rss_final += rss
+        rss_pico += pico
+    elapsed = time.perf_counter() - start
+    for proceso in procesos:
+        proceso.join()
+
+    todas = np.array([valor for valores in latencias.values() for valor in valores])
+    return {
+        'sesiones': sesiones,
+        'segundos': elapsed,
+        'ejecuciones': int(len(todas)),
+        'ejecuciones_por_segundo': len(todas) / elapsed if elapsed else 0.0,
+        'latencia': _percentiles(todas),
+        'latencia_por_pagina': {pagina: _percentiles(np.array(valores)) for pagina, valores in latencias.items()},
+        # Suma de todas las sesiones: el pico de cada proceso y su memoria al terminar
+        'rss_pico_bytes': rss_pico,
+        'rss_final_bytes': rss_final,
+        'rss_por_sesion_bytes': rss_pico / len(procesos),
+        'errores': errores[:20],
+        'total_errores': len(errores)
+    }
+
+def _percentiles(valores):
+    if not len(valores):
+        return None
+    p50, p90, p95, p99 = np.percentile(valores, [50, 90, 95, 99])
+    return {
+        'p50': float(p50), 'p90': float(p90), 'p95': float(p95), 'p99': float(p99),
+        'max': float(valores.max()), 'n': int(len(valores))
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=data_manager.DB_PATH)
+    parser.add_argument('--sesiones', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--paginas', nargs='+', choices=list(GUIONES), default=['inventario', 'descuentos', 'inicio'])
+    parser.add_argument('--duracion', type=float, default=20, help="segundos por cantidad de sesiones")
+    parser.add_argument('--importar', help="archivo CSV o Excel que una sesión extra importa en bucle")
+    parser.add_argument('--salida', help="archivo JSON con los resultados")
+    args = parser.parse_args()
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        data_manager.DB_PATH = os.path.join(tmp, 'inventory.db')
+        shutil.copy(args.db, data_manager.DB_PATH)
+        data_manager.initialize_database()
+        jobs.UPLOAD_DIR = os.path.join(tmp, 'imports')
+
+        # Las páginas usan rutas relativas (logo, caché de imágenes)
+        os.chdir(ROOT)
+
+        df = data_manager.load_data()
+        palabras = df['producto'].str.split().explode().dropna()
+        terminos = palabras[palabras.str.len() >= 3].drop_duplicates().sample(
+            min(200, palabras.nunique()), random_state=0
+        ).tolist()
+
+        for sesiones in args.sesiones:
+            resultado = run(sesiones, args.paginas, args.duracion, terminos, args.importar)
+            resultados.append(resultado)
+            latencia = resultado['latencia'] or {'p50': 0, 'p95': 0, 'p99': 0}
+            print(
+                f"{sesiones} sesiones: {resultado['ejecuciones_por_segundo']:.1f} ejecuciones/s, "
+                f"p50 {latencia['p50'] * 1000:.0f} ms, p95 {latencia['p95'] * 1000:.0f} ms, "
+                f"p99 {latencia['p99'] * 1000:.0f} ms, RSS {resultado['rss_pico_bytes'] / 2**20:.0f} MB"
+                + (f", {resultado['total_errores']} errores" if resultado['total_errores'] else '')
+            )
+
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump({
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'paginas': args.paginas,
+                'duracion': args.duracion,
+                'resultados': resultados
+            }, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Verifica las tasas de cambio (utils/rates.py) con un archivo JSON local y un
+servidor HTTP local que responde con retardo: los proveedores guardan las
+tasas en el historial, current_rates nunca espera al proveedor (la
+actualización ocurre en segundo plano), un proveedor caído deja las últimas
+tasas guardadas o las fijas y las consultas históricas usan el índice.
+
+    python -m benchmarks.rates_check
+    python -m benchmarks.rates_check --retardo 2
+
+Trabaja sobre una base de datos temporal. Termina con código 1 si alguna
+verificación falla.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils import data_manager, rates
+from utils.db import close_connections, get_connection
+
+# Llamadas a current_rates para medir la lectura desde la caché
+CACHED_CALLS = 10000
+
+# Lecturas con el proveedor caído (antes y después del intento fallido)
+FAILING_READS = 50
+
+class StubServer:
+    """Servidor de tasas que responde con retardo; con `caido` responde 500"""
+
+    def __init__(self, retardo, payload):
+        self.retardo = retardo
+        self.payload = payload
+        self.caido = False
+        self.peticiones = 0
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.peticiones += 1
+                time.sleep(stub.retardo)
+                if stub.caido:
+                    self.send_error(500)
+                    return
+                body = json.dumps(stub.payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server.server_port}/tasas'
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def _reset_cache():
+    """Caché en memoria vacía, como en un proceso recién iniciado"""
+    with rates._cache_lock:
+        rates._cache.update({'value': None, 'loaded_at': 0.0, 'attempted_at': None, 'refreshing': False})
+    with rates._history_lock:
+        rates._history.clear()
+
+def _expire_cache():
+    """Como si hubiera pasado RATES_TTL desde la última carga y el último intento"""
+    with rates._cache_lock:
+        rates._cache['loaded_at'] = 0.0
+        rates._cache['attempted_at'] = None
+
+def _wait_refresh(timeout):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        with rates._cache_lock:
+            if not rates._cache['refreshing']:
+                return True
+        time.sleep(0.05)
+    return False
+
+def run_checks(tmp, retardo):
+    """Ejecuta las verificaciones; retorna una lista de (nombre, ok, detalle)"""
+    resultados = []
+
+    def check(nombre, ok, detalle):
+        resultados.append((nombre, bool(ok), detalle))
+
+    # Proveedor de archivo: guarda el día en el historial
+    archivo = os.path.join(tmp, 'tasas.json')
+    with open(archivo, 'w', encoding='utf-8') as f:
+        json.dump({'fecha': '2025-01-10', 'tasas': {'COP': 4300, 'EUR': 0.97}}, f)
+    leidas = rates.refresh_rates(rates.get_provider(archivo))
+    check(
+        "proveedor de archivo",
+        leidas is not None and leidas['fuente'] == 'archivo' and leidas['cop_usd'] == 4300,
+        f"{leidas['fecha'] if leidas else None}, COP/USD {leidas['cop_usd'] if leidas else None}"
+    )
+
+    # Proveedor HTTP: el formato con "rates" y "date" también se acepta
+    stub = StubServer(retardo, {'date': '2025-02-10', 'rates': {'cop': 4100, 'eur': 0.95}})
+    try:
+        leidas = rates.refresh_rates(rates.get_provider(stub.url))
+        check(
+            "proveedor HTTP",
+            leidas is not None and leidas['fuente'] == 'http' and leidas['cop_usd'] == 4100,
+            f"{leidas['fecha'] if leidas else None}, COP/USD {leidas['cop_usd'] if leidas else None}"
+        )
+
+        # Tasas vencidas: current_rates responde de inmediato con las que tiene
+        # y la actualización con el proveedor lento ocurre en segundo plano
+        rates.RATES_SOURCE = stub.url
+        stub.payload = {'fecha': '2025-03-10', 'tasas': {'COP': 3900, 'EUR': 0.92}}
+        _expire_cache()
+        start = time.perf_counter()
+        vigentes = rates.current_rates()
+        elapsed = time.perf_counter() - start
+        check(
+            "lectura sin esperar",
+            vigentes['cop_usd'] == 4100 and elapsed < retardo / 2,
+            f"{elapsed * 1000:.1f} ms con un proveedor de {retardo:.2f} s"
+        )
+        actualizada = _wait_refresh(retardo * 5)
+        vigentes = rates.current_rates()
+        check(
+            "actualización en segundo plano",
+            actualizada and vigentes['cop_usd'] == 3900 and vigentes['fecha'] == '2025-03-10',
+            f"{vigentes['fecha']}, COP/USD {vigentes['cop_usd']}"
+        )
+
+        # Lectura desde la caché vigente
+        start = time.perf_counter()
+        for _ in range(CACHED_CALLS):
+            rates.current_rates()
+        por_llamada = (time.perf_counter() - start) / CACHED_CALLS
+        check("lectura en caché", por_llamada < 0.001, f"{por_llamada * 1e6:.1f} µs por llamada")
+
+        # Proveedor caído: se conservan las tasas y un proceso nuevo lee el historial
+        stub.caido = True
+        fallida = rates.refresh_rates()
+        _reset_cache()
+        vigentes = rates.current_rates()
+        _wait_refresh(retardo * 5)
+        with rates._cache_lock:
+            en_cache = rates._cache['value']
+        check(
+            "proveedor caído",
+            fallida is None and vigentes['cop_usd'] == 3900 and en_cache['cop_usd'] == 3900,
+            f"refresh_rates -> {fallida}, se usan las del {vigentes['fecha']}"
+        )
+
+        # Con el proveedor caído las lecturas siguientes no vuelven a
+        # consultarlo hasta que pase RATES_TTL desde el intento fallido
+        _expire_cache()
+        antes = stub.peticiones
+        for _ in range(FAILING_READS):
+            rates.current_rates()
+        _wait_refresh(retardo * 5)
+        for _ in range(FAILING_READS):
+            rates.current_rates()
+        _wait_refresh(retardo * 5)
+        check(
+            "un intento por TTL",
+            stub.peticiones - antes == 1,
+            f"{stub.peticiones - antes} peticiones en {FAILING_READS * 2} lecturas con el proveedor caído"
+        )
+    finally:
+        stub.close()
+
+    # Sin historial ni proveedor: las tasas fijas del código
+    rates.RATES_SOURCE = os.path.join(tmp, 'no_existe.json')
+    data_manager.DB_PATH = os.path.join(tmp, 'vacia.db')
+    _reset_cache()
+    vigentes = rates.current_rates()
+    _wait_refresh(retardo * 5)
+    check(
+        "tasas fijas",
+        vigentes['fuente'] == rates.StaticRateProvider.name,
+        f"fuente {vigentes['fuente']}, {vigentes['fecha']}"
+    )
+    data_manager.DB_PATH = os.path.join(tmp, 'inventory.db')
+
+    # Historial: el último día registrado hasta la fecha, por el índice (fecha, moneda)
+    _reset_cache()
+    en_fecha = rates.rates_at('2025-02-20')
+    antes = rates.rates_at('2024-12-31')
+    plan = ' '.join(
+        row[-1] for row in get_connection(data_manager.DB_PATH).execute(
+            'EXPLAIN QUERY PLAN SELECT MAX(fecha) FROM exchange_rates WHERE fecha <= ?', ('2025-02-20',)
+        )
+    )
+    check(
+        "consulta histórica",
+        en_fecha is not None and en_fecha['fecha'] == '2025-02-10' and antes is None and 'INDEX' in plan,
+        f"2025-02-20 -> {en_fecha['fecha'] if en_fecha else None}; plan: {plan}"
+    )
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--retardo', type=float, default=1.0, help="segundos de cada respuesta del servidor")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_manager.DB_PATH = os.path.join(tmp, 'inventory.db')
+        _reset_cache()
+        try:
+            resultados = run_checks(tmp, args.retardo)
+        finally:
+            close_connections()
+
+    fallas = 0
+    for nombre, ok, detalle in resultados:
+        fallas += not ok
+        print(f"  {nombre:30s} {'ok' if ok else 'FALLA'}  ({detalle})")
+    sys.exit(1 if fallas else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,58 @@
 import streamlit as st
 import pandas as pd
-from utils.data_manager import load_data
+from datetime import date, datetime, time
+from utils.data_manager import LOW_STOCK, load_data, fts_available, get_inventory_stats, query_inventory, summarize_inventory
+from utils.search import get_search_index
+from utils.table_view import pagination_controls, paginate, style_stock
+from utils.thumbnails import has_thumbnails, thumbnail_uris
+from utils.instrumentation import page, track
+from utils.history import history_start, inventory_at, stock_at
 
 st.set_page_config(page_title="Inventario", page_icon="📦", layout="wide")
 
+# A partir de este número de productos los filtros se resuelven en SQLite y
+# solo las filas que los cumplen se cargan en memoria
+SQL_QUERY_THRESHOLD = 50000
+
+# Máximo de filas en la tabla de stock bajo
+LOW_STOCK_ROWS = 500
+
+# Máximo de filas mostradas del inventario en otra fecha
+HISTORY_ROWS = 500
+
+COLUMN_LABELS = {
+    'producto': "Producto",
+    'referencia': "Referencia",
+    'codigo': "Código",
+    'cantidad': "Cantidad",
+    'precio': "Precio"
+}
+
+@page('inventario')
 def main():
     st.title("📦 Gestión de Inventario")
 
+    stats = get_inventory_stats()
+    use_sql = (
+        stats is not None
+        and stats['total_productos'] > SQL_QUERY_THRESHOLD
+        and fts_available()
+    )
+
     # Load data
-    df = load_data()
-    try:
-        if df is None or df.empty:
-            st.info("📝 No hay datos de inventario disponibles. Por favor, importe datos en la sección de Configuración.")
+    if use_sql:
+        df = None
+        precio_tope = float(stats['precio_max'] or 0)
+    else:
+        df = load_data()
+        try:
+            if df is None or df.empty:
+                st.info("📝 No hay datos de inventario disponibles. Por favor, importe datos en la sección de Configuración.")
+                return
+        except Exception as e:
+            st.error("Error al cargar datos. Por favor, intente nuevamente.")
             return
-    except Exception as e:
-        st.error("Error al cargar datos. Por favor, intente nuevamente.")
-        return
+        precio_tope = float(stats['precio_max'] if stats is not None else df['precio'].max())
 
     # Búsqueda y filtros
     col1, col2, col3 = st.columns([2, 1, 1])
@@ -25,91 +62,192 @@ def main():
     with col2:
         precio_min = st.number_input("💰 Precio mínimo", 0.0, value=0.0, step=1000.0)
     with col3:
-        precio_max = st.number_input("💰 Precio máximo", 0.0, value=float(df['precio'].max()), step=1000.0)
+        precio_max = st.number_input("💰 Precio máximo", 0.0, value=precio_tope, step=1000.0)
 
     hide_zero = st.checkbox("🚫 Ocultar productos agotados", value=False)
 
+    # Sin filtros las métricas salen de las estadísticas precalculadas
+    sin_filtros = not search and not hide_zero and precio_min <= 0 and precio_max >= precio_tope
+
     # Aplicar filtros
-    mask = pd.Series(True, index=df.index)
+    if sin_filtros and stats is not None:
+        filtros = {}
+        filtered_df = df
+        metricas = {
+            'total_productos': stats['total_productos'],
+            'valor_total': stats['valor_inventario'],
+            'agotados': stats['agotados'],
+            'precio_promedio': stats['precio_promedio']
+        }
+    elif use_sql:
+        filtros = {
+            'search': search,
+            'precio_min': precio_min,
+            'precio_max': precio_max,
+            'solo_disponibles': hide_zero
+        }
+        metricas = summarize_inventory(**filtros)
+        if metricas is None:
+            st.error("Error al cargar datos. Por favor, intente nuevamente.")
+            return
+    else:
+        with track('inventario.filtros'):
+            mask = pd.Series(True, index=df.index)
 
-    if hide_zero:
-        mask = mask & (df['cantidad'] > 0)
+            if hide_zero:
+                mask = mask & (df['cantidad'] > 0)
 
-    if search:
-        search_mask = (
-            df['producto'].str.contains(search, case=False, na=False) |
-            df['codigo'].str.contains(search, case=False, na=False) |
-            df['referencia'].str.contains(search, case=False, na=False)
-        )
-        mask = mask & search_mask
+            if search:
+                mask = mask & get_search_index(df).mask(search)
 
-    mask = mask & (df['precio'] >= precio_min) & (df['precio'] <= precio_max)
+            mask = mask & (df['precio'] >= precio_min) & (df['precio'] <= precio_max)
 
-    filtered_df = df[mask]
+            filtered_df = df[mask]
+            metricas = {
+                'total_productos': len(filtered_df),
+                'valor_total': (filtered_df['precio'] * filtered_df['cantidad']).sum(),
+                'agotados': int((filtered_df['cantidad'] == 0).sum()),
+                'precio_promedio': filtered_df['precio'].mean()
+            }
 
     # Mostrar métricas
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("📦 Total Productos", len(filtered_df))
+        st.metric("📦 Total Productos", metricas['total_productos'])
     with col2:
-        valor_total = (filtered_df['precio'] * filtered_df['cantidad']).sum()
-        st.metric("💵 Valor Total", f"${valor_total:,.2f}")
+        st.metric("💵 Valor Total", f"${metricas['valor_total']:,.2f}")
     with col3:
-        agotados = len(filtered_df[filtered_df['cantidad'] == 0])
-        st.metric("⚠️ Productos Agotados", agotados)
+        st.metric("⚠️ Productos Agotados", metricas['agotados'])
     with col4:
-        st.metric("💰 Precio Promedio", f"${filtered_df['precio'].mean():,.2f}")
-
-    # Mostrar tabla de inventario
-    def highlight_agotados(row):
-        if row['cantidad'] <= 0:
-            return ['background-color: #ffebee; color: #c62828'] * len(row)
-        elif row['cantidad'] < 5:
-            return ['background-color: #fff3e0; color: #ef6c00'] * len(row)
-        return [''] * len(row)
-
-    st.dataframe(
-        filtered_df.style.apply(highlight_agotados, axis=1),
-        use_container_width=True,
-        hide_index=True,
-        column_config={
-            "producto": st.column_config.TextColumn(
-                "Producto",
-                width="large",
-            ),
-            "referencia": st.column_config.TextColumn(
-                "Referencia",
-                width="medium",
-            ),
-            "codigo": st.column_config.TextColumn(
-                "Código",
-                width="medium",
-            ),
-            "cantidad": st.column_config.NumberColumn(
-                "Cantidad",
-                help="🔴 Rojo: Agotado | 🟠 Naranja: Stock bajo",
-                format="%d",
-            ),
-            "precio": st.column_config.NumberColumn(
-                "Precio",
-                format="$%,.0f",
-            ),
-        }
+        precio_promedio = metricas['precio_promedio']
+        st.metric("💰 Precio Promedio", f"${0 if pd.isna(precio_promedio) else precio_promedio:,.2f}")
+
+    # Mostrar tabla de inventario: solo se consulta, resalta y envía la página visible
+    pagina = pagination_controls(
+        metricas['total_productos'],
+        key="inventario",
+        sort_columns=['producto', 'referencia', 'codigo', 'cantidad', 'precio'],
+        labels=COLUMN_LABELS
     )
+    if use_sql:
+        page_df = query_inventory(
+            **filtros,
+            order_by=pagina['sort_by'],
+            ascending=pagina['ascending'],
+            limit=pagina['page_size'],
+            offset=(pagina['page'] - 1) * pagina['page_size']
+        )
+    else:
+        page_df = paginate(filtered_df, **pagina)
+
+    # Miniaturas solo de la página visible (ya generadas, no se decodifica nada)
+    if has_thumbnails():
+        page_df = page_df.copy()
+        page_df.insert(0, 'imagen', thumbnail_uris(page_df['codigo']))
+
+    with track('inventario.tabla'):
+        st.dataframe(
+            style_stock(page_df),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "imagen": st.column_config.ImageColumn(
+                    "Imagen",
+                    width="small",
+                ),
+                "producto": st.column_config.TextColumn(
+                    "Producto",
+                    width="large",
+                ),
+                "referencia": st.column_config.TextColumn(
+                    "Referencia",
+                    width="medium",
+                ),
+                "codigo": st.column_config.TextColumn(
+                    "Código",
+                    width="medium",
+                ),
+                "cantidad": st.column_config.NumberColumn(
+                    "Cantidad",
+                    help="🔴 Rojo: Agotado | 🟠 Naranja: Stock bajo",
+                    format="%d",
+                ),
+                "precio": st.column_config.NumberColumn(
+                    "Precio",
+                    format="$%,.0f",
+                ),
+            }
+        )
 
     # Estadísticas adicionales
     st.markdown("### 📊 Resumen de Inventario")
     col1, col2 = st.columns(2)
 
+    if sin_filtros and stats is not None:
+        top_expensive = pd.DataFrame(stats['top_precios'], columns=['producto', 'precio'])
+    elif use_sql:
+        top_expensive = query_inventory(**filtros, order_by='precio', ascending=False, limit=5)
+    else:
+        top_expensive = filtered_df.nlargest(5, 'precio')
+
+    if use_sql:
+        low_stock = query_inventory(**filtros, max_cantidad=LOW_STOCK, order_by='cantidad', limit=LOW_STOCK_ROWS + 1)
+    else:
+        low_stock = filtered_df[filtered_df['cantidad'] < LOW_STOCK].nsmallest(LOW_STOCK_ROWS + 1, 'cantidad')
+
     with col1:
         st.markdown("#### 💎 Top 5 Productos más caros")
-        top_expensive = filtered_df.nlargest(5, 'precio')[['producto', 'precio']]
-        st.dataframe(top_expensive, hide_index=True)
+        st.dataframe(top_expensive[['producto', 'precio']], hide_index=True)
 
     with col2:
-        st.markdown("#### ⚠️ Productos con stock bajo (menos de 5 unidades)")
-        low_stock = filtered_df[filtered_df['cantidad'] < 5][['producto', 'cantidad']]
-        st.dataframe(low_stock, hide_index=True)
+        st.markdown(f"#### ⚠️ Productos con stock bajo (menos de {LOW_STOCK} unidades)")
+        st.dataframe(low_stock[['producto', 'cantidad']].head(LOW_STOCK_ROWS), hide_index=True)
+        if len(low_stock) > LOW_STOCK_ROWS:
+            st.caption(f"Se muestran los {LOW_STOCK_ROWS} productos con menos unidades")
+
+    inventario_en_fecha()
+
+def inventario_en_fecha():
+    """Stock y precios reconstruidos desde el historial de movimientos"""
+    with st.expander("📅 Inventario en otra fecha"):
+        with st.form("historial"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                fecha = st.date_input("Fecha", value=date.today())
+            with col2:
+                hora = st.time_input("Hora", value=time(23, 59))
+            with col3:
+                codigo = st.text_input("Código (opcional)")
+            consultar = st.form_submit_button("Consultar")
+
+        inicio = history_start()
+        if inicio:
+            st.caption(f"Historial disponible desde {inicio.replace('T', ' ')}")
+        if not consultar:
+            return
+
+        momento = datetime.combine(fecha, hora)
+        if codigo:
+            estado = stock_at(codigo.strip(), momento)
+            if estado is None:
+                st.info(f"El producto {codigo} no existía en esa fecha o no hay historial")
+                return
+            col1, col2 = st.columns(2)
+            col1.metric("Cantidad", estado['cantidad'])
+            col2.metric("Precio", f"${estado['precio']:,.0f}")
+            return
+
+        estado = inventory_at(momento)
+        if estado is None:
+            st.info("No hay historial para esa fecha")
+            return
+        col1, col2, col3 = st.columns(3)
+        col1.metric("📦 Productos", f"{len(estado):,}")
+        col2.metric("🔢 Unidades", f"{estado['cantidad'].sum():,}")
+        col3.metric("💵 Valor", f"${(estado['cantidad'] * estado['precio']).sum():,.2f}")
+        st.dataframe(estado.head(HISTORY_ROWS), use_container_width=True, hide_index=True)
+        if len(estado) > HISTORY_ROWS:
+            st.caption(f"Mostrando {HISTORY_ROWS} de {len(estado):,} productos")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,49 @@
+import streamlit as st
+from datetime import datetime, timedelta
+from utils.analysis import analyze_trends, calculate_sales_metrics
+
+st.set_page_config(page_title="Análisis de Ventas", page_icon="📈", layout="wide")
+
+# Días mostrados por defecto en la gráfica de ventas diarias
+DEFAULT_DAYS = 90
+
+def main():
+    st.title("📈 Análisis de Ventas")
+
+    try:
+        metrics = calculate_sales_metrics()
+    except Exception as e:
+        st.error("Error al cargar las ventas")
+        print(f"Error al cargar métricas de ventas: {str(e)}")
+        return
+
+    if not metrics['productos_vendidos']:
+        st.info("Aún no hay ventas registradas")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total de Ventas", f"${metrics['total_ventas']:,.0f}")
+    col2.metric("Unidades Vendidas", f"{metrics['productos_vendidos']:,}")
+    col3.metric("Promedio por Línea", f"${metrics['ticket_promedio']:,.0f}")
+    col4.metric("Categorías", metrics['categorias'])
+
+    hoy = datetime.now().date()
+    periodo = st.date_input("Período", value=(hoy - timedelta(days=DEFAULT_DAYS), hoy))
+    # Mientras se elige el rango, el selector retorna solo la fecha inicial
+    desde = periodo[0] if len(periodo) > 0 else None
+    hasta = periodo[1] if len(periodo) > 1 else None
+    trends = analyze_trends(desde, hasta)
+
+    st.subheader("Ventas diarias")
+    st.line_chart(trends['daily_sales'])
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Ventas por categoría")
+        st.bar_chart(trends['category_sales'])
+    with col2:
+        st.subheader("Productos más vendidos")
+        st.dataframe(trends['top_products'], use_container_width=True)
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,79 @@
 import streamlit as st
 import pandas as pd
 import os
-from utils.data_manager import initialize_database, import_file_to_db, load_data
+from utils.data_manager import initialize_database, load_data, memory_report
+from utils.jobs import get_job, submit_import
+from utils.table_view import style_stock
+from utils.search import normalize_code
+from utils.thumbnails import attach_images
+from utils.instrumentation import page
 
 st.set_page_config(page_title="Configuración", page_icon="⚙️")
 
+# Filas mostradas en la vista previa después de importar
+PREVIEW_ROWS = 100
+
+# Segundos entre consultas del avance de una importación
+POLL_SECONDS = 1.0
+
 def validate_file(file):
     file_extension = os.path.splitext(file.name)[1].lower()
     return file_extension in ['.csv', '.xlsx', '.xls']
 
+@st.fragment(run_every=POLL_SECONDS)
+def avance_importacion(job_id):
+    """Muestra el avance de la importación sin bloquear el resto de la página"""
+    job = get_job(job_id)
+    if job is None or job['estado'] not in ('pendiente', 'en_proceso'):
+        st.rerun()
+    if job['estado'] == 'pendiente':
+        st.info(f"⏳ {job['archivo']}: en espera de otra importación")
+    else:
+        st.progress(
+            min(job['fraccion'] or 0.0, 1.0),
+            text=f"Importando {job['archivo']}... {job['filas_leidas'] or 0:,} filas procesadas"
+        )
+
+def mostrar_resultado(job):
+    if job['estado'] == 'fallido':
+        st.error(f"❌ Error al importar datos: {job['error']}")
+        return
+
+    st.success(f"✅ Datos importados exitosamente ({job['archivo']})")
+    if job['descartados']:
+        st.warning(f"⚠️ {job['descartados']} filas sin producto o código fueron descartadas")
+    if job['invalidos']:
+        st.warning(f"⚠️ {job['invalidos']} filas con cantidad o precio no numérico se importaron como 0")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("➕ Insertados", job['insertados'])
+    col2.metric("✏️ Actualizados", job['actualizados'])
+    col3.metric("🗑️ Eliminados", job['eliminados'])
+    col4.metric("⏸️ Sin cambios", job['sin_cambios'])
+    # Mostrar vista previa de los datos importados (solo las primeras filas)
+    df = load_data()
+    if df is not None:
+        st.dataframe(
+            style_stock(df.head(PREVIEW_ROWS)),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "cantidad": st.column_config.NumberColumn(
+                    "Cantidad",
+                    help="🔴 Rojo: Agotado | 🟠 Naranja: Stock bajo"
+                ),
+                "precio": st.column_config.NumberColumn(
+                    "Precio",
+                    format="$%.2f"
+                )
+            }
+        )
+        if len(df) > PREVIEW_ROWS:
+            st.caption(
+                f"Mostrando {PREVIEW_ROWS} de {len(df):,} productos. "
+                "Consulte el inventario completo en la página Inventario."
+            )
+
+@page('configuracion')
 def main():
     st.title("⚙️ Configuración del Sistema")
 
@@ -44,37 +109,78 @@ def main():
         help="Se intentarán detectar automáticamente las columnas y el formato"
     )
 
-    if uploaded_file is not None:
+    import_mode = st.radio(
+        "Modo de importación",
+        options=['replace', 'upsert'],
+        format_func=lambda x: {
+            'replace': "Reemplazar todo el inventario",
+            'upsert': "Actualizar solo los cambios (por código)"
+        }[x],
+        help="La actualización incremental solo modifica los productos nuevos o con cambios"
+    )
+    delete_missing = False
+    if import_mode == 'upsert':
+        delete_missing = st.checkbox(
+            "Eliminar productos que no estén en el archivo",
+            value=False
+        )
+
+    # Se encola solo al presionar el botón, con el modo elegido en ese momento:
+    # la página se vuelve a ejecutar con cada interacción y el archivo sigue
+    # cargado en el selector
+    if uploaded_file is not None and st.button("📥 Importar"):
         try:
             if validate_file(uploaded_file):
-                if import_file_to_db(uploaded_file):
-                    st.success("✅ Datos importados exitosamente")
-                    # Mostrar vista previa de los datos importados
-                    df = load_data()
-                    if df is not None:
-                        st.dataframe(
-                            df,
-                            use_container_width=True,
-                            hide_index=True,
-                            column_config={
-                                "cantidad": st.column_config.NumberColumn(
-                                    "Cantidad",
-                                    help="Productos con cantidad 0 se muestran en rojo"
-                                ),
-                                "precio": st.column_config.NumberColumn(
-                                    "Precio",
-                                    format="$%.2f"
-                                )
-                            }
-                        )
-                else:
-                    st.error("❌ Error al importar datos")
+                st.session_state.import_job = submit_import(
+                    uploaded_file.name,
+                    uploaded_file.getvalue(),
+                    mode=import_mode,
+                    delete_missing=delete_missing
+                )
             else:
                 st.error("❌ Formato de archivo no soportado")
         except Exception as e:
             st.error("No se pudo procesar el archivo. Por favor, verifique el formato.")
             print(f"Error detallado: {str(e)}")
 
+    job_id = st.session_state.get('import_job')
+    if job_id:
+        job = get_job(job_id)
+        if job is not None and job['estado'] in ('pendiente', 'en_proceso'):
+            avance_importacion(job_id)
+        elif job is not None:
+            mostrar_resultado(job)
+
+    # Product images
+    st.subheader("Imágenes de Productos")
+    st.markdown("El nombre de cada imagen debe ser el código del producto (por ejemplo `2949.jpg`).")
+    image_files = st.file_uploader(
+        "Seleccione imágenes",
+        type=['jpg', 'jpeg', 'png', 'webp'],
+        accept_multiple_files=True
+    )
+    if image_files and st.button("Asociar imágenes"):
+        with st.spinner("Generando miniaturas..."):
+            resultado = attach_images([
+                (normalize_code(os.path.splitext(f.name)[0]), f.getvalue()) for f in image_files
+            ])
+        st.success(f"✅ {resultado['asociadas']} imágenes asociadas")
+        if resultado['errores']:
+            st.warning(f"⚠️ {resultado['errores']} imágenes no se pudieron procesar")
+
+    # Memory usage of the shared inventory copy
+    with st.expander("Uso de memoria del inventario"):
+        reporte = memory_report()
+        if reporte is not None:
+            total, generico = reporte['bytes'].sum(), reporte['bytes_generico'].sum()
+            st.metric(
+                "Memoria de la copia compartida",
+                f"{total / 1e6:,.1f} MB",
+                delta=f"-{(generico - total) / 1e6:,.1f} MB frente a tipos genéricos",
+                delta_color="inverse"
+            )
+            st.dataframe(reporte, use_container_width=True, hide_index=True)
+
     # System settings
     st.header("Configuración General")
 
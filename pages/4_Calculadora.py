@@ -1,63 +1,98 @@
 import streamlit as st
+import pandas as pd
 from datetime import datetime
+from utils.currency import convert, convert_prices, rate
+from utils.rates import current_rates, rates_at
+from utils.data_manager import get_inventory_stats, load_data
+from utils.table_view import pagination_controls, paginate
 
 st.set_page_config(page_title="Calculadora de Monedas", page_icon="💱", layout="wide")
 
-# Tasas de cambio fijas (actualizadas al 8 de marzo 2025)
-TASAS = {
-    'USD': {
-        'EUR': 0.91,
-        'GBP': 0.78,
-        'JPY': 147.50,
-        'CHF': 0.88,
-        'CAD': 1.35,
-        'AUD': 1.52,
-        'CNY': 7.19
-    }
-}
-
-def calcular_tasa(moneda_origen, moneda_destino, tasa_cop_usd):
+def calcular_tasa(moneda_origen, moneda_destino, tasa_cop_usd, usd_rates=None):
     """Calcula la tasa de cambio entre dos monedas"""
-    if moneda_origen == moneda_destino:
-        return 1.0
-
-    # Manejar conversiones con COP
-    if moneda_origen == 'COP' and moneda_destino == 'USD':
-        return 1 / tasa_cop_usd
-    if moneda_origen == 'USD' and moneda_destino == 'COP':
-        return tasa_cop_usd
-    if moneda_origen == 'COP':
-        return (1 / tasa_cop_usd) * TASAS['USD'][moneda_destino]
-    if moneda_destino == 'COP':
-        if moneda_origen in TASAS['USD']:
-            return tasa_cop_usd / TASAS['USD'][moneda_origen]
-        return tasa_cop_usd * (1 / TASAS['USD'][moneda_origen])
-
-    # Si tenemos la tasa directa USD a moneda_destino
-    if moneda_origen == 'USD' and moneda_destino in TASAS['USD']:
-        return TASAS['USD'][moneda_destino]
-
-    # Si necesitamos la tasa inversa
-    if moneda_destino == 'USD' and moneda_origen in TASAS['USD']:
-        return 1 / TASAS['USD'][moneda_origen]
-
-    # Si necesitamos hacer una conversión cruzada a través de USD
-    if moneda_origen in TASAS['USD'] and moneda_destino in TASAS['USD']:
-        tasa_origen_usd = 1 / TASAS['USD'][moneda_origen]
-        tasa_usd_destino = TASAS['USD'][moneda_destino]
-        return tasa_origen_usd * tasa_usd_destino
+    return rate(moneda_origen, moneda_destino, tasa_cop_usd, usd_rates)
+
+def inventario_en_moneda(tasa_cop_usd, usd_rates, monedas):
+    """Valor del inventario y lista de precios convertidos a otras monedas"""
+    st.markdown("### 📦 Inventario en otras monedas")
+
+    df = load_data()
+    stats = get_inventory_stats()
+    if df is None or df.empty or stats is None:
+        st.warning("No hay datos de inventario disponibles")
+        return
+
+    destinos = st.multiselect(
+        "Monedas de destino",
+        options=[moneda for moneda in monedas if moneda == 'USD' or moneda in usd_rates],
+        default=['USD', 'EUR'],
+        format_func=lambda x: monedas[x]
+    )
+    if not destinos:
+        return
+
+    for col, moneda in zip(st.columns(len(destinos)), destinos):
+        valor = convert(stats['valor_inventario'], 'COP', moneda, tasa_cop_usd, usd_rates)
+        col.metric(f"Valor del inventario ({moneda})", f"{float(valor):,.2f}")
+
+    # Toda la columna de precios se convierte de una vez; solo se muestra una página
+    precios = convert_prices(df['precio'], destinos, 'COP', tasa_cop_usd, usd_rates)
+    lista = pd.concat([df[['producto', 'codigo', 'precio']], precios.add_prefix('precio_')], axis=1)
+
+    pagina = pagination_controls(len(lista), key="monedas", sort_columns=['producto', 'precio'])
+    st.dataframe(
+        paginate(lista, **pagina),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "precio": st.column_config.NumberColumn("Precio (COP)", format="$%,.0f"),
+            **{
+                f"precio_{moneda}": st.column_config.NumberColumn(f"Precio ({moneda})", format="%,.2f")
+                for moneda in destinos
+            }
+        }
+    )
+
+def inventario_a_fecha(monedas):
+    """Valor del inventario con las tasas registradas en una fecha"""
+    st.markdown("### 📅 Valor del inventario a la tasa de una fecha")
+
+    stats = get_inventory_stats()
+    if stats is None:
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        fecha = st.date_input("Fecha", value=datetime.now().date())
+    with col2:
+        moneda = st.selectbox(
+            "Moneda",
+            options=[moneda for moneda in monedas if moneda != 'COP'],
+            format_func=lambda x: monedas[x],
+            key="moneda_historica"
+        )
+
+    tasas = rates_at(fecha)
+    if tasas is None or (moneda != 'USD' and moneda not in tasas['usd']):
+        st.info("No hay tasas registradas hasta esa fecha")
+        return
+    valor = convert(stats['valor_inventario'], 'COP', moneda, tasas['cop_usd'], tasas['usd'])
+    st.metric(f"Valor del inventario ({moneda})", f"{float(valor):,.2f}")
+    st.caption(f"Tasas del {tasas['fecha']} (fuente: {tasas['fuente']})")
 
 def main():
+    tasas = current_rates()
+
     st.markdown("""
     <h1 style='text-align: center; color: #3BA8A8;'>
         💱 Calculadora Mágica de Divisas ✨
     </h1>
     """, unsafe_allow_html=True)
 
-    st.markdown("""
+    st.markdown(f"""
     <div style='padding: 15px; background-color: #f0f8ff; border-radius: 10px; margin-bottom: 20px;'>
         🌍 Convierte fácilmente entre diferentes monedas del mundo
-        <br>🔄 Tasas de cambio actualizadas al 8 de marzo 2025
+        <br>🔄 Tasas de cambio actualizadas al {tasas['fecha']}
         <br>💡 Soporte para múltiples divisas
         <br>🎯 Tasa COP/USD personalizable
     </div>
@@ -69,7 +104,7 @@ def main():
         "Tasa de cambio COP/USD",
         min_value=1000.0,
         max_value=10000.0,
-        value=3900.0,
+        value=min(max(float(tasas['cop_usd']), 1000.0), 10000.0),
         step=10.0,
         help="Define la tasa de cambio entre Peso Colombiano y Dólar"
     )
@@ -112,7 +147,7 @@ def main():
     # Botón de conversión con estilo
     if st.button("💫 Convertir", type="primary", use_container_width=True):
         try:
-            tasa = calcular_tasa(moneda_origen, moneda_destino, tasa_cop_usd)
+            tasa = calcular_tasa(moneda_origen, moneda_destino, tasa_cop_usd, tasas['usd'])
             resultado = cantidad * tasa
 
             # Mostrar resultado con estilo
@@ -131,6 +166,10 @@ def main():
         except Exception as e:
             st.error("❌ Error al realizar la conversión. Por favor, intente nuevamente.")
 
+    st.markdown("---")
+    inventario_en_moneda(tasa_cop_usd, tasas['usd'], monedas)
+    inventario_a_fecha(monedas)
+
     # Información adicional con estilo
     st.markdown("---")
     st.markdown("""
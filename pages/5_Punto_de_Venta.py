@@ -0,0 +1,92 @@
+import streamlit as st
+import pandas as pd
+from utils.data_manager import checkout, load_data
+from utils.search import get_search_index
+from utils.instrumentation import page
+
+st.set_page_config(page_title="Punto de Venta", page_icon="🛒", layout="wide")
+
+# Máximo de coincidencias mostradas en el selector de productos
+MAX_OPTIONS = 50
+
+def agregar_al_carrito(row, cantidad):
+    carrito = st.session_state.carrito
+    codigo = str(row['codigo'])
+    if codigo in carrito:
+        carrito[codigo]['cantidad'] += cantidad
+    else:
+        carrito[codigo] = {
+            'codigo': codigo,
+            'producto': row['producto'],
+            'precio': float(row['precio']),
+            'cantidad': cantidad
+        }
+
+@page('punto_de_venta')
+def main():
+    st.title("🛒 Punto de Venta")
+
+    if 'carrito' not in st.session_state:
+        st.session_state.carrito = {}
+
+    df = load_data()
+    if df is None or df.empty:
+        st.warning("No hay datos de inventario disponibles")
+        return
+
+    col1, col2 = st.columns([2, 1])
+
+    with col1:
+        search = st.text_input("🔍 Buscar producto o escanear código", key="pos_busqueda")
+        if search:
+            # Las coincidencias exactas de código (lector de barras) van primero
+            encontrados = df.iloc[get_search_index(df).search(search)[:MAX_OPTIONS]]
+            if encontrados.empty:
+                st.info("No se encontraron productos")
+            else:
+                options = list(range(len(encontrados)))
+                position = st.selectbox(
+                    "Producto",
+                    options,
+                    format_func=lambda i: (
+                        f"{encontrados.iloc[i]['producto']} — ${encontrados.iloc[i]['precio']:,.0f} "
+                        f"({encontrados.iloc[i]['cantidad']} disponibles)"
+                    )
+                )
+                row = encontrados.iloc[position]
+                cantidad = st.number_input("Cantidad", min_value=1, value=1, step=1)
+                if st.button("➕ Agregar al carrito"):
+                    agregar_al_carrito(row, int(cantidad))
+
+    with col2:
+        st.subheader("Carrito")
+        carrito = st.session_state.carrito
+        if not carrito:
+            st.info("El carrito está vacío")
+            return
+
+        detalle = pd.DataFrame(list(carrito.values()))
+        detalle['subtotal'] = detalle['precio'] * detalle['cantidad']
+        st.dataframe(
+            detalle[['producto', 'cantidad', 'subtotal']],
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "subtotal": st.column_config.NumberColumn("Subtotal", format="$%,.0f")
+            }
+        )
+        st.metric("Total", f"${detalle['subtotal'].sum():,.0f}")
+
+        if st.button("💳 Cobrar", type="primary", use_container_width=True):
+            resultado = checkout(list(carrito.values()))
+            if resultado['exito']:
+                st.session_state.carrito = {}
+                st.success(f"✅ Venta registrada por ${resultado['total']:,.0f}")
+            else:
+                st.error(f"❌ {resultado['error']}")
+        if st.button("🗑️ Vaciar carrito", use_container_width=True):
+            st.session_state.carrito = {}
+            st.rerun()
+
+if __name__ == "__main__":
+    main()
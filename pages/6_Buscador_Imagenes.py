@@ -1,8 +1,6 @@
 import streamlit as st
-import requests
-from PIL import Image
-from io import BytesIO
 import random
+from utils.images import fetch_images
 
 st.set_page_config(page_title="Buscador de Imágenes", page_icon="🔍", layout="wide")
 
@@ -50,17 +48,27 @@ def main():
     if search_query:
         st.markdown(f"### ✨ Mostrando resultados para: {search_query}")
 
+        # Las URLs de cada búsqueda se conservan entre recargas de la página
+        # (por ejemplo, al pulsar los botones de cada imagen)
+        image_urls = st.session_state.setdefault('image_urls', {})
+        if search_query not in image_urls:
+            image_urls[search_query] = [get_random_image_category(search_query, i) for i in range(6)]
+        urls = image_urls[search_query]
+
+        # Descargar las 6 imágenes de forma simultánea (o leerlas de la caché)
+        images = fetch_images(urls)
+
         # Crear un grid de imágenes
         cols = st.columns(3)
         for i in range(6):  # Mostrar 6 imágenes
             with cols[i % 3]:
                 try:
-                    # Obtener URL de imagen basada en la categoría
-                    img_url = get_random_image_category(search_query, i)
-                    response = requests.get(img_url)
+                    img_url = urls[i]
+                    img = images[i]
 
-                    if response.status_code == 200:
-                        img = Image.open(BytesIO(response.content))
+                    if img is None:
+                        st.error("Error al cargar imagen")
+                    else:
                         st.image(
                             img, 
                             caption=f"Imagen #{i+1}",
@@ -1,18 +1,37 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import math
 from utils.data_manager import load_data
+from utils.search import get_price_index, get_search_index
+from utils.thumbnails import get_thumbnail_path
+from utils.instrumentation import page
+from utils.discounts import (
+    DEFAULT_COST_RATIO, DEFAULT_TIERS, categorize_price, estimated_margin, get_discount_table,
+    simulate_promotion, sweep_discounts
+)
 
 st.set_page_config(page_title="Calculadora de Descuentos", page_icon="🧮", layout="wide")
 
+DISCOUNT_TABLE_COLUMNS = [
+    'producto', 'referencia', 'codigo', 'precio', 'min_descuento', 'max_descuento',
+    'precio_final', 'margen_estimado'
+]
+
+DISCOUNT_TABLE_CONFIG = {
+    'producto': 'Producto',
+    'referencia': 'Referencia',
+    'codigo': 'Código',
+    'precio': st.column_config.NumberColumn('Precio ($)', format="$%d"),
+    'min_descuento': st.column_config.NumberColumn('Descuento Mínimo (%)', format="%d%%"),
+    'max_descuento': st.column_config.NumberColumn('Descuento Máximo (%)', format="%d%%"),
+    'precio_final': st.column_config.NumberColumn('Precio con Descuento Máximo ($)', format="$%d"),
+    'margen_estimado': st.column_config.NumberColumn('Margen Estimado (%)', format="%.1f%%")
+}
+
 def calcular_categorizacion(precio):
     """Categoriza el producto según su precio"""
-    if precio < 50000:
-        return "pequeño", (1, 5)
-    elif precio < 1200000:
-        return "mediano", (5, 12)
-    else:
-        return "grande", (12, 15)
+    return categorize_price(precio)
 
 def analizar_descuento(precio, porcentaje_descuento):
     """Analiza si un descuento es seguro para el negocio"""
@@ -30,6 +49,97 @@ def analizar_descuento(precio, porcentaje_descuento):
         "razon": f"El descuento está {'dentro' if es_seguro else 'fuera'} del rango recomendado ({rango[0]}-{rango[1]}%)"
     }
 
+def simulacion_promocion(inventario_df):
+    """Simula una política de descuentos sobre el catálogo completo o un subconjunto"""
+    st.markdown("---")
+    st.markdown("### 🎯 Simulación de Promoción")
+    st.markdown("Evalúe una política de descuentos sobre todo el inventario o una parte de él.")
+
+    # Subconjunto del inventario
+    col1, col2 = st.columns(2)
+    with col1:
+        busqueda = st.text_input("🔍 Productos incluidos (vacío = todo el catálogo)", key="sim_busqueda")
+    subset = inventario_df
+    if busqueda:
+        subset = inventario_df.iloc[get_search_index(inventario_df).search(busqueda)]
+
+    columnas_regla = [col for col in ['linea', 'nomb_marca'] if col in inventario_df.columns]
+    with col2:
+        costo = st.slider(
+            "Costo estimado (% del precio)",
+            min_value=0, max_value=100,
+            value=int(DEFAULT_COST_RATIO * 100),
+            key="sim_costo"
+        ) / 100
+
+    # Política de descuentos
+    tipos = {'plano': "Descuento plano", 'categoria': "Por categoría de precio"}
+    if columnas_regla:
+        tipos['reglas'] = "Por línea o marca"
+    tipo = st.radio("Política", list(tipos), format_func=tipos.get, horizontal=True, key="sim_tipo")
+
+    if tipo == 'plano':
+        politica = {
+            'tipo': 'plano',
+            'descuento': st.slider("Descuento (%)", 0, 50, 10, key="sim_plano")
+        }
+    elif tipo == 'categoria':
+        cols = st.columns(len(DEFAULT_TIERS))
+        descuentos = {}
+        for col, (_, categoria, minimo, maximo) in zip(cols, DEFAULT_TIERS):
+            with col:
+                descuentos[categoria] = st.number_input(
+                    f"{categoria.capitalize()} (%)", 0, 100, int(maximo), key=f"sim_cat_{categoria}"
+                )
+        politica = {'tipo': 'categoria', 'descuentos': descuentos}
+    else:
+        columna = st.selectbox("Aplicar por", columnas_regla, key="sim_columna")
+        valores = sorted(subset[columna].dropna().astype(str).unique())
+        seleccion = st.multiselect("Valores con descuento", valores, key="sim_valores")
+        col1, col2 = st.columns(2)
+        with col1:
+            descuento_regla = st.slider("Descuento para los seleccionados (%)", 0, 50, 10, key="sim_regla")
+        with col2:
+            descuento_defecto = st.slider("Descuento para el resto (%)", 0, 50, 0, key="sim_defecto")
+        politica = {
+            'tipo': 'reglas',
+            'columna': columna,
+            'descuentos': {valor: descuento_regla for valor in seleccion},
+            'defecto': descuento_defecto
+        }
+
+    if subset.empty:
+        st.info("No hay productos que coincidan con la búsqueda.")
+        return
+
+    resumen, detalle = simulate_promotion(subset, politica, cost_ratio=costo)
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("📦 Productos", f"{resumen['productos']:,}")
+    col2.metric("💸 Ingresos en riesgo", f"${resumen['ingresos_en_riesgo']:,.0f}")
+    col3.metric("⚠️ Descuentos inseguros", f"{resumen['descuentos_inseguros']:,}")
+    col4.metric("📈 Margen ponderado", f"{resumen['margen_ponderado']:.1f}%")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### Distribución del margen estimado")
+        conteos, bordes = np.histogram(detalle['margen_estimado'], bins=20)
+        st.bar_chart(pd.DataFrame(
+            {'Productos': conteos},
+            index=[f"{borde:.0f}%" for borde in bordes[:-1]]
+        ))
+    with col2:
+        st.markdown("#### Barrido de descuento plano")
+        barrido = sweep_discounts(subset, np.arange(0, 51), cost_ratio=costo)
+        st.line_chart(barrido.set_index('descuento')[['ingresos_en_riesgo']])
+        st.line_chart(barrido.set_index('descuento')[['descuentos_inseguros']])
+
+    inseguros = detalle[~detalle['es_seguro']]
+    if not inseguros.empty:
+        st.markdown("#### Productos con descuento fuera del rango recomendado")
+        st.dataframe(inseguros.head(100), use_container_width=True, hide_index=True)
+
+@page('descuentos')
 def main():
     st.title("🧮 Calculadora de Descuentos")
 
@@ -41,6 +151,8 @@ def main():
     # Inventario para selección de productos
     inventario_df = load_data()
     product_from_inventory = False
+    selected_row = None
+    agrupar_por = None
     precio = 0.0
 
     # Opción para seleccionar un producto del inventario
@@ -53,19 +165,25 @@ def main():
             filtered_df = inventario_df
 
             if search:
-                filtered_df = inventario_df[
-                    inventario_df['producto'].str.contains(search, case=False, na=False) |
-                    inventario_df['codigo'].str.contains(search, case=False, na=False) |
-                    inventario_df['referencia'].str.contains(search, case=False, na=False)
-                ]
+                # Las coincidencias exactas de código (lector de barras) van primero
+                filtered_df = inventario_df.iloc[get_search_index(inventario_df).search(search)]
 
             if not filtered_df.empty:
                 options = filtered_df['producto'].tolist()
-                selected_product = st.selectbox("Seleccione un producto", options)
+                selected_position = st.selectbox(
+                    "Seleccione un producto",
+                    range(len(options)),
+                    format_func=lambda i: options[i]
+                )
 
-                selected_row = filtered_df[filtered_df['producto'] == selected_product].iloc[0]
+                selected_row = filtered_df.iloc[selected_position]
+                selected_product = options[selected_position]
                 precio = float(selected_row['precio'])
 
+                thumbnail = get_thumbnail_path(selected_row['codigo'])
+                if thumbnail:
+                    st.image(thumbnail, width=128)
+
                 st.info(f"""
                 **Producto seleccionado:** {selected_product}
                 **Referencia:** {selected_row['referencia']}
@@ -73,6 +191,22 @@ def main():
                 **Precio:** ${precio:,.0f}
                 **Cantidad disponible:** {selected_row['cantidad']}
                 """)
+
+                # Restringir la comparación de productos similares a la misma línea o marca
+                columnas_grupo = [
+                    col for col in ['linea', 'nomb_marca']
+                    if col in filtered_df.columns and pd.notna(selected_row[col])
+                ]
+                if columnas_grupo:
+                    agrupar_por = st.selectbox(
+                        "Comparar con productos similares de",
+                        [None] + columnas_grupo,
+                        format_func=lambda col: {
+                            None: "Todo el inventario",
+                            'linea': "La misma línea",
+                            'nomb_marca': "La misma marca"
+                        }[col]
+                    )
             else:
                 st.warning("No se encontraron productos que coincidan con la búsqueda.")
 
@@ -142,7 +276,7 @@ def main():
             """, unsafe_allow_html=True)
 
             # Mostrar margen estimado
-            margen_estimado = (analisis['precio_final'] / precio - 0.6) * 100  # Asumiendo costo = 60% del precio
+            margen_estimado = float(estimated_margin(descuento))  # Asumiendo costo = 60% del precio
 
             if margen_estimado > 15:
                 margen_color = "green"
@@ -174,37 +308,16 @@ def main():
         st.markdown("### 📋 Descuentos Recomendados por Producto")
 
         try:
-            inv_df = load_data()
+            inv_df = inventario_df
             if inv_df is not None and not inv_df.empty:
-                # Calcular los rangos de descuento para cada producto
-                descuentos_df = pd.DataFrame()
-                descuentos_df['producto'] = inv_df['producto']
-                descuentos_df['referencia'] = inv_df['referencia']
-                descuentos_df['codigo'] = inv_df['codigo']
-                descuentos_df['precio'] = inv_df['precio']
-
-                # Calcular categoría y rangos
-                descuentos_df['categoria'] = descuentos_df['precio'].apply(
-                    lambda x: calcular_categorizacion(x)[0]
-                )
-                descuentos_df['min_descuento'] = descuentos_df['precio'].apply(
-                    lambda x: calcular_categorizacion(x)[1][0]
-                )
-                descuentos_df['max_descuento'] = descuentos_df['precio'].apply(
-                    lambda x: calcular_categorizacion(x)[1][1]
-                )
+                # Categoría, rangos y precio con el descuento máximo de todo el
+                # catálogo, calculados una sola vez por versión de los datos
+                descuentos_df = get_discount_table(inv_df)
 
                 # Mostrar tabla de descuentos
                 st.dataframe(
-                    descuentos_df[['producto', 'referencia', 'codigo', 'precio', 'min_descuento', 'max_descuento']],
-                    column_config={
-                        'producto': 'Producto',
-                        'referencia': 'Referencia',
-                        'codigo': 'Código',
-                        'precio': st.column_config.NumberColumn('Precio ($)', format="$%d"),
-                        'min_descuento': st.column_config.NumberColumn('Descuento Mínimo (%)', format="%d%%"),
-                        'max_descuento': st.column_config.NumberColumn('Descuento Máximo (%)', format="%d%%")
-                    },
+                    descuentos_df[DISCOUNT_TABLE_COLUMNS],
+                    column_config=DISCOUNT_TABLE_CONFIG,
                     use_container_width=True,
                     hide_index=True
                 )
@@ -212,23 +325,13 @@ def main():
                 # Agregar filtro de búsqueda para esta tabla
                 search_product = st.text_input("🔍 Buscar producto para ver descuentos recomendados")
                 if search_product:
-                    filtered_discounts = descuentos_df[
-                        descuentos_df['producto'].str.contains(search_product, case=False, na=False) |
-                        descuentos_df['codigo'].str.contains(search_product, case=False, na=False) |
-                        descuentos_df['referencia'].str.contains(search_product, case=False, na=False)
-                    ]
+                    # descuentos_df conserva el orden de filas del inventario
+                    filtered_discounts = descuentos_df.iloc[get_search_index(inv_df).search(search_product)]
 
                     if not filtered_discounts.empty:
                         st.dataframe(
-                            filtered_discounts[['producto', 'referencia', 'codigo', 'precio', 'min_descuento', 'max_descuento']],
-                            column_config={
-                                'producto': 'Producto',
-                                'referencia': 'Referencia',
-                                'codigo': 'Código',
-                                'precio': st.column_config.NumberColumn('Precio ($)', format="$%d"),
-                                'min_descuento': st.column_config.NumberColumn('Descuento Mínimo (%)', format="%d%%"),
-                                'max_descuento': st.column_config.NumberColumn('Descuento Máximo (%)', format="%d%%")
-                            },
+                            filtered_discounts[DISCOUNT_TABLE_COLUMNS],
+                            column_config=DISCOUNT_TABLE_CONFIG,
                             use_container_width=True,
                             hide_index=True
                         )
@@ -243,14 +346,16 @@ def main():
         st.markdown("### 📊 Productos Similares en Inventario")
 
         try:
-            inv_df = load_data()
+            inv_df = inventario_df
             if inv_df is not None:
                 # Asegurarse de que las columnas necesarias existen
                 if all(col in inv_df.columns for col in ['producto', 'precio', 'cantidad']):
-                    productos_similares = inv_df[
-                        (inv_df['precio'] >= precio * 0.8) & 
-                        (inv_df['precio'] <= precio * 1.2)
-                    ]
+                    # Banda de ±20% del precio resuelta con búsqueda binaria
+                    price_index = get_price_index(inv_df)
+                    grupo = {}
+                    if agrupar_por is not None:
+                        grupo = {'columna': agrupar_por, 'valor': selected_row[agrupar_por]}
+                    productos_similares = inv_df.iloc[price_index.band(precio * 0.8, precio * 1.2, **grupo)]
 
                     if not productos_similares.empty:
                         st.info(f"""
@@ -261,9 +366,10 @@ def main():
                         - Cantidad total disponible: {productos_similares['cantidad'].sum()} unidades
                         """)
 
-                        # Mostrar productos similares
+                        # Mostrar los productos de precio más cercano
+                        cercanos = inv_df.iloc[price_index.nearest(precio, 5, **grupo)]
                         st.dataframe(
-                            productos_similares[['producto', 'referencia', 'codigo', 'cantidad', 'precio']].head(5),
+                            cercanos[['producto', 'referencia', 'codigo', 'cantidad', 'precio']],
                             use_container_width=True,
                             hide_index=True
                         )
@@ -274,5 +380,8 @@ def main():
         except Exception as e:
             st.error(f"Error al buscar productos similares: {str(e)}")
 
+    if inventario_df is not None and not inventario_df.empty:
+        simulacion_promocion(inventario_df)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,99 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from utils import instrumentation
+
+st.set_page_config(page_title="Diagnóstico", page_icon="🩺", layout="wide")
+
+# Páginas instrumentadas que se pueden perfilar
+PAGINAS = {
+    'inventario': "Inventario",
+    'configuracion': "Configuración",
+    'punto_de_venta': "Punto de Venta",
+    'descuentos': "Calculadora de Descuentos"
+}
+
+# Intervalos del histograma de duraciones
+HISTOGRAM_BINS = 20
+
+def main():
+    st.title("🩺 Diagnóstico")
+    st.markdown(
+        "Tiempos de las operaciones del inventario y de las páginas desde que "
+        "se inició el servidor (últimas llamadas de cada métrica)."
+    )
+
+    if not instrumentation.ENABLED:
+        st.warning("La instrumentación está desactivada (INSTRUMENTACION=0)")
+        return
+
+    col1, col2 = st.columns([1, 5])
+    with col1:
+        if st.button("🔄 Actualizar"):
+            st.rerun()
+    with col2:
+        if st.button("🗑️ Reiniciar métricas"):
+            instrumentation.reset()
+
+    resumen = instrumentation.summary()
+    if resumen.empty:
+        st.info("Aún no hay mediciones. Navegue por las páginas del sistema y vuelva aquí.")
+    else:
+        st.dataframe(
+            resumen,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'metrica': "Métrica",
+                'llamadas': st.column_config.NumberColumn("Llamadas", format="%d"),
+                'total_s': st.column_config.NumberColumn("Total (s)", format="%.2f"),
+                'p50_ms': st.column_config.NumberColumn("p50 (ms)", format="%.1f"),
+                'p90_ms': st.column_config.NumberColumn("p90 (ms)", format="%.1f"),
+                'p99_ms': st.column_config.NumberColumn("p99 (ms)", format="%.1f"),
+                'max_ms': st.column_config.NumberColumn("Máx (ms)", format="%.1f")
+            }
+        )
+
+        metrica = st.selectbox("Distribución de", resumen['metrica'].tolist())
+        duraciones = instrumentation.durations(metrica) * 1000
+        conteos, bordes = np.histogram(duraciones, bins=HISTOGRAM_BINS)
+        st.bar_chart(pd.DataFrame(
+            {'Llamadas': conteos},
+            index=[f"{borde:.1f} ms" for borde in bordes[:-1]]
+        ))
+
+    contadores = instrumentation.counters()
+    if contadores:
+        st.subheader("Contadores")
+        cols = st.columns(min(len(contadores), 4))
+        for i, (nombre, valor) in enumerate(sorted(contadores.items())):
+            cols[i % len(cols)].metric(nombre, f"{valor:,}")
+
+    # Perfil de una ejecución completa de página
+    st.subheader("Perfil de una ejecución")
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        pagina = st.selectbox("Página", list(PAGINAS), format_func=PAGINAS.get)
+    with col2:
+        st.write("")
+        if st.button("🎯 Perfilar la próxima ejecución"):
+            instrumentation.request_profile(pagina)
+
+    pendiente = instrumentation.pending_profile()
+    if pendiente:
+        st.info(f"Se perfilará la próxima ejecución de {PAGINAS.get(pendiente, pendiente)}")
+
+    for perfil in instrumentation.profiles():
+        titulo = f"{PAGINAS.get(perfil['pagina'], perfil['pagina'])} — {perfil['fecha']} ({perfil['segundos'] * 1000:,.0f} ms)"
+        with st.expander(titulo):
+            st.code(perfil['resumen'], language=None)
+            st.download_button(
+                "⬇️ Descargar perfil (.prof)",
+                data=perfil['prof'],
+                file_name=f"{perfil['pagina']}_{perfil['fecha'].replace(':', '')}.prof",
+                mime="application/octet-stream",
+                key=f"perfil_{perfil['pagina']}_{perfil['fecha']}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,44 @@
 import pandas as pd
-import numpy as np
 
-def calculate_sales_metrics(df):
+from utils.sales import sales_connection
+
+def calculate_sales_metrics():
     """
-    Calculate basic sales metrics from DataFrame
+    Calculate basic sales metrics from the precomputed sales rollups
     """
+    conn = sales_connection()
+    total, unidades, lineas = conn.execute(
+        'SELECT COALESCE(SUM(total), 0), COALESCE(SUM(unidades), 0), COALESCE(SUM(lineas), 0) FROM ventas_diarias'
+    ).fetchone()
+    categorias = conn.execute('SELECT COUNT(*) FROM ventas_categoria WHERE unidades > 0').fetchone()[0]
+
     metrics = {
-        'total_ventas': df['precio'].sum(),
-        'productos_vendidos': df['cantidad'].sum(),
-        'ticket_promedio': df['precio'].mean(),
-        'categorias': len(df['categoria'].unique())
+        'total_ventas': total,
+        'productos_vendidos': unidades,
+        'ticket_promedio': total / lineas if lineas else 0.0,
+        'categorias': categorias
     }
     return metrics
 
-def analyze_trends(df):
+def analyze_trends(desde=None, hasta=None, top_n=10):
     """
-    Analyze sales trends
+    Analyze sales trends from the daily, category and product rollups.
+    Daily sales can be limited to a date range; category and product totals
+    cover the whole history.
     """
+    conn = sales_connection()
+    params = [str(desde or '0000-00-00'), str(hasta or '9999-99-99')]
+    daily = pd.read_sql_query(
+        'SELECT fecha, total FROM ventas_diarias WHERE fecha BETWEEN ? AND ? ORDER BY fecha', conn, params=params
+    )
+    categories = pd.read_sql_query('SELECT categoria, total FROM ventas_categoria ORDER BY total DESC', conn)
+    products = pd.read_sql_query(
+        'SELECT producto, unidades FROM ventas_producto ORDER BY unidades DESC LIMIT ?', conn, params=[top_n]
+    )
+
     trends = {
-        'daily_sales': df.groupby('fecha')['precio'].sum(),
-        'category_sales': df.groupby('categoria')['precio'].sum(),
-        'top_products': df.groupby('producto')['cantidad'].sum().sort_values(ascending=False).head(10)
+        'daily_sales': daily.set_index('fecha')['total'],
+        'category_sales': categories.set_index('categoria')['total'],
+        'top_products': products.set_index('producto')['unidades']
     }
     return trends
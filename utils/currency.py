@@ -0,0 +1,75 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Tasas de cambio fijas (actualizadas al 8 de marzo 2025): unidades por 1 USD
+TASAS = {
+    'USD': {
+        'EUR': 0.91,
+        'GBP': 0.78,
+        'JPY': 147.50,
+        'CHF': 0.88,
+        'CAD': 1.35,
+        'AUD': 1.52,
+        'CNY': 7.19
+    }
+}
+
+DEFAULT_COP_USD = 3900.0
+
+_matrix_lock = threading.Lock()
+_matrix = {'key': None, 'currencies': None, 'positions': None, 'rates': None}
+
+def build_rate_matrix(usd_rates, tasa_cop_usd):
+    """
+    Construye la matriz N×N de tasas: rates[i, j] es el valor de 1 unidad de
+    la moneda i expresado en la moneda j. Todas las tasas pasan por el USD.
+    """
+    per_usd = {'USD': 1.0, 'COP': float(tasa_cop_usd)}
+    per_usd.update({moneda: float(tasa) for moneda, tasa in usd_rates.items()})
+
+    currencies = list(per_usd)
+    units = np.array([per_usd[moneda] for moneda in currencies])
+    rates = units[None, :] / units[:, None]
+    return currencies, rates
+
+def get_rate_matrix(tasa_cop_usd=DEFAULT_COP_USD, usd_rates=None):
+    """
+    Matriz de tasas para las tasas dadas. Se reconstruye solo cuando cambia
+    alguna tasa de entrada. Retorna (monedas, posiciones, matriz).
+    """
+    usd_rates = TASAS['USD'] if usd_rates is None else usd_rates
+    key = (float(tasa_cop_usd), tuple(sorted(usd_rates.items())))
+    with _matrix_lock:
+        if _matrix['key'] != key:
+            currencies, rates = build_rate_matrix(usd_rates, tasa_cop_usd)
+            rates.setflags(write=False)
+            _matrix.update(
+                key=key,
+                currencies=currencies,
+                positions={moneda: i for i, moneda in enumerate(currencies)},
+                rates=rates
+            )
+        return _matrix['currencies'], _matrix['positions'], _matrix['rates']
+
+def rate(moneda_origen, moneda_destino, tasa_cop_usd=DEFAULT_COP_USD, usd_rates=None):
+    """Tasa de cambio de moneda_origen a moneda_destino"""
+    _, positions, rates = get_rate_matrix(tasa_cop_usd, usd_rates)
+    return float(rates[positions[moneda_origen], positions[moneda_destino]])
+
+def convert(montos, moneda_origen, moneda_destino, tasa_cop_usd=DEFAULT_COP_USD, usd_rates=None):
+    """Convierte un arreglo de montos de una moneda a otra en una sola operación"""
+    return np.asarray(montos, dtype=float) * rate(moneda_origen, moneda_destino, tasa_cop_usd, usd_rates)
+
+def convert_prices(precios, monedas, moneda_origen='COP', tasa_cop_usd=DEFAULT_COP_USD, usd_rates=None):
+    """
+    Convierte una columna de precios a varias monedas a la vez (producto
+    externo con la fila de la matriz). Retorna un DataFrame con una columna
+    por moneda, alineado con `precios`.
+    """
+    _, positions, rates = get_rate_matrix(tasa_cop_usd, usd_rates)
+    factores = rates[positions[moneda_origen], [positions[moneda] for moneda in monedas]]
+    valores = np.asarray(precios, dtype=float)[:, None] * factores[None, :]
+    index = precios.index if isinstance(precios, pd.Series) else None
+    return pd.DataFrame(valores, columns=list(monedas), index=index)
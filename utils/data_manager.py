@@ -1,96 +1,1033 @@
 import pandas as pd
+import numpy as np
 import sqlite3
 import os
+import json
+import threading
+import time
+import random
 from datetime import datetime
 
+from utils.db import get_connection
+from utils.instrumentation import count, timed
+
 DB_PATH = 'inventory.db'
 
-def initialize_database():
-    """Inicializa la base de datos si no existe"""
-    conn = sqlite3.connect(DB_PATH)
+# Copia en memoria del inventario compartida por todas las sesiones y páginas.
+# Se identifica por la ruta de la base de datos y la versión de los datos, que
+# import_file_to_db incrementa cada vez que modifica la tabla. Las ventas no
+# cambian la versión: sus movimientos de stock se aplican sobre la copia.
+_snapshot_lock = threading.Lock()
+_snapshot = {'version': None, 'df': None, 'movimiento': 0, 'positions': None}
+
+# Estructuras calculadas a partir del snapshot (índices, tablas derivadas),
+# guardadas junto al DataFrame del que se construyeron. _derived_lock solo
+# protege los diccionarios; cada estructura se construye con su propio
+# bloqueo, así una lenta (el índice de búsqueda) no detiene a las demás
+_derived_lock = threading.Lock()
+_derived = {}
+_derived_builds = {}  # nombre -> bloqueo de construcción
+
+REQUIRED_COLUMNS = ['producto', 'referencia', 'codigo', 'cantidad', 'precio']
+OPTIONAL_COLUMNS = ['nomb_marca', 'linea']
+INVENTORY_COLUMNS = REQUIRED_COLUMNS + OPTIONAL_COLUMNS
+
+# Nombres de columna del ERP y su equivalente en la tabla inventory
+COLUMN_MAPPING = {
+    'nombre': 'producto',
+    'refer': 'referencia',
+    'q_fin': 'cantidad',
+    'pvta1i': 'precio'
+}
+
+# Filas por bloque al importar y bytes usados para detectar el formato del CSV
+CHUNK_SIZE = 5000
+SNIFF_BYTES = 64 * 1024
+
+# Productos con menos unidades que este umbral se consideran con stock bajo
+LOW_STOCK = 5
+
+# Cantidad de productos en el top por precio de las estadísticas precalculadas
+STATS_TOP_N = 5
+
+# Tipos compactos de la copia en memoria: texto con muchos valores repetidos
+# como categoría y la cantidad como entero de 32 bits. El precio se deja en
+# 64 bits: precio * cantidad en 32 bits desborda sin aviso (un producto de
+# 33 millones con 64 unidades ya supera el máximo)
+CATEGORY_COLUMNS = ['referencia', 'nomb_marca', 'linea']
+CATEGORY_MAX_RATIO = 0.5  # máximo de valores distintos por fila para usar categoría
+INTEGER_COLUMNS = ['cantidad']
+
+# Formato de la copia Arrow: cambia cuando cambian los tipos de las columnas,
+# para no abrir copias guardadas con los tipos anteriores
+SNAPSHOT_FORMAT = 2
+
+# Reintentos de una venta cuando la base de datos está bloqueada por otra escritura
+CHECKOUT_RETRIES = 5
+CHECKOUT_BACKOFF = 0.05  # segundos, se duplica en cada reintento
+
+# Estadísticas del inventario leídas de la base de datos, por versión de datos
+_stats_lock = threading.Lock()
+_stats = {'version': None, 'value': None}
+
+# Solo una importación a la vez escribe en la base de datos
+_import_lock = threading.Lock()
+
+# Versión del esquema que crea initialize_database, guardada en PRAGMA
+# user_version: con el esquema al día no se escribe nada, así las páginas
+# pueden llamarla en cada ejecución aunque una importación tenga el bloqueo
+SCHEMA_VERSION = 2
+
+def initialize_database(db_path=None):
+    """Inicializa la base de datos si no existe o su esquema está desactualizado"""
+    conn = get_connection(db_path or DB_PATH)
+    if conn.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+        return
     c = conn.cursor()
 
     c.execute('''
         CREATE TABLE IF NOT EXISTS inventory
-        (producto TEXT, referencia TEXT, codigo TEXT, cantidad INTEGER, precio REAL, nomb_marca TEXT, linea TEXT)
+        (id INTEGER PRIMARY KEY, producto TEXT, referencia TEXT, codigo TEXT, cantidad INTEGER, precio REAL,
+         nomb_marca TEXT, linea TEXT)
     ''')
 
+    # Bases de datos antiguas se crearon sin las columnas opcionales
+    existing_columns = [row[1] for row in c.execute('PRAGMA table_info(inventory)')]
+    for column in OPTIONAL_COLUMNS:
+        if column not in existing_columns:
+            c.execute(f'ALTER TABLE inventory ADD COLUMN {column} TEXT')
+    if 'id' not in existing_columns:
+        _add_inventory_id(c)
+
+    # El código identifica al producto: conservar la última fila de cada código
+    # antes de crear el índice único que usan las importaciones incrementales
+    c.execute('''
+        DELETE FROM inventory
+        WHERE codigo IS NOT NULL
+          AND rowid NOT IN (SELECT MAX(rowid) FROM inventory GROUP BY codigo)
+    ''')
+    c.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_inventory_codigo ON inventory(codigo)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_inventory_precio ON inventory(precio)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_inventory_cantidad ON inventory(cantidad)')
+
+    _create_fts(c)
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS inventory_meta
+        (clave TEXT PRIMARY KEY, valor TEXT)
+    ''')
+    c.execute("INSERT OR IGNORE INTO inventory_meta (clave, valor) VALUES ('data_version', '0')")
+
+    _create_movements(c)
+
+    # Punto de partida del historial de movimientos
+    from utils.history import ensure_checkpoint
+    ensure_checkpoint(c)
+
+    # Bases de datos importadas antes de existir las estadísticas precalculadas
+    if c.execute("SELECT 1 FROM inventory_meta WHERE clave = 'stats'").fetchone() is None:
+        _refresh_inventory_stats(c)
+
+    c.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
     conn.commit()
-    conn.close()
 
-def import_file_to_db(file):
-    """Importa datos desde un archivo CSV o Excel a la base de datos"""
+def _add_inventory_id(c):
+    """
+    Copia el inventario a una tabla con id INTEGER PRIMARY KEY. El rowid
+    implícito puede cambiar con VACUUM y el índice FTS quedaría apuntando a
+    otras filas; el id declarado se conserva. Los índices y el FTS de la
+    tabla anterior se vuelven a crear después.
+    """
+    columns = ', '.join(INVENTORY_COLUMNS)
+    c.execute('DROP TABLE IF EXISTS inventory_fts')
+    c.execute('''
+        CREATE TABLE inventory_id
+        (id INTEGER PRIMARY KEY, producto TEXT, referencia TEXT, codigo TEXT, cantidad INTEGER, precio REAL,
+         nomb_marca TEXT, linea TEXT)
+    ''')
+    c.execute(f'INSERT INTO inventory_id (id, {columns}) SELECT rowid, {columns} FROM inventory')
+    c.execute('DROP TABLE inventory')
+    c.execute('ALTER TABLE inventory_id RENAME TO inventory')
+
+def _create_fts(c):
+    """
+    Crea el índice de texto completo (FTS5) del inventario y los triggers que
+    lo mantienen sincronizado. Si SQLite no incluye FTS5 no se crea nada y las
+    consultas usan LIKE. El índice apunta al id de inventory, que a
+    diferencia del rowid implícito no cambia con VACUUM.
+    """
+    exists = c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'inventory_fts'"
+    ).fetchone()
+    if exists:
+        return
+
+    # El tokenizador trigram permite buscar subcadenas; las versiones antiguas
+    # de SQLite no lo tienen o no saben ignorar tildes con él
+    for tokenizer in ['trigram remove_diacritics 1', 'trigram', 'unicode61 remove_diacritics 2']:
+        try:
+            c.execute(f'''
+                CREATE VIRTUAL TABLE inventory_fts USING fts5(
+                    producto, codigo, referencia,
+                    content='inventory', content_rowid='id',
+                    tokenize='{tokenizer}'
+                )
+            ''')
+            break
+        except sqlite3.OperationalError:
+            continue
+    else:
+        return
+
+    c.executescript('''
+        CREATE TRIGGER IF NOT EXISTS inventory_fts_insert AFTER INSERT ON inventory BEGIN
+            INSERT INTO inventory_fts (rowid, producto, codigo, referencia)
+            VALUES (new.id, new.producto, new.codigo, new.referencia);
+        END;
+        CREATE TRIGGER IF NOT EXISTS inventory_fts_delete AFTER DELETE ON inventory BEGIN
+            INSERT INTO inventory_fts (inventory_fts, rowid, producto, codigo, referencia)
+            VALUES ('delete', old.id, old.producto, old.codigo, old.referencia);
+        END;
+        CREATE TRIGGER IF NOT EXISTS inventory_fts_update AFTER UPDATE OF producto, codigo, referencia ON inventory BEGIN
+            INSERT INTO inventory_fts (inventory_fts, rowid, producto, codigo, referencia)
+            VALUES ('delete', old.id, old.producto, old.codigo, old.referencia);
+            INSERT INTO inventory_fts (rowid, producto, codigo, referencia)
+            VALUES (new.id, new.producto, new.codigo, new.referencia);
+        END;
+    ''')
+    c.execute("INSERT INTO inventory_fts (inventory_fts) VALUES ('rebuild')")
+
+def _create_movements(c):
+    """
+    Movimientos de stock de las ventas y las importaciones: actualizan las
+    copias en memoria y permiten reconstruir el inventario de otra fecha
+    (ver utils/history.py)
+    """
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS inventory_movements
+        (id INTEGER PRIMARY KEY, fecha TEXT, codigo TEXT, delta_cantidad INTEGER, origen TEXT)
+    ''')
+
+def _last_movement(conn):
+    """Id del último movimiento de stock (0 si no hay)"""
     try:
-        # Determinar el tipo de archivo
-        file_extension = os.path.splitext(file.name)[1].lower()
-
-        if file_extension == '.csv':
-            # Intentar diferentes delimitadores
-            encodings = ['utf-8', 'latin1', 'cp1252']
-            separators = [',', ';']
-            
-            for encoding in encodings:
-                for sep in separators:
-                    try:
-                        df = pd.read_csv(file, encoding=encoding, sep=sep)
-                        if len(df.columns) > 1:  # Verificar si se leyó correctamente
-                            break
-                    except:
-                        continue
-                if 'df' in locals():
-                    break
-        elif file_extension in ['.xls', '.xlsx']:
-            df = pd.read_excel(file)
-        else:
-            return False
-
-        # Renombrar columnas si es necesario
-        column_mapping = {
-            'nombre': 'producto',
-            'refer': 'referencia',
-            'q_fin': 'cantidad',
-            'pvta1i': 'precio'
-        }
+        return conn.execute('SELECT COALESCE(MAX(id), 0) FROM inventory_movements').fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
 
-        df.rename(columns=str.lower, inplace=True)
-        df.rename(columns=column_mapping, inplace=True)
+def get_data_version(conn=None):
+    """Retorna la versión actual de los datos del inventario"""
+    try:
+        row = (conn or get_connection(DB_PATH)).execute(
+            "SELECT valor FROM inventory_meta WHERE clave = 'data_version'"
+        ).fetchone()
+        return int(row[0]) if row else 0
+    except sqlite3.Error:
+        # Bases de datos creadas antes de existir la tabla de metadatos
+        return 0
 
-        # Asegurarse de que las columnas requeridas existan
-        required_columns = ['producto', 'referencia', 'codigo', 'cantidad', 'precio']
-        if not all(col in df.columns for col in required_columns):
-            return False
+def _bump_data_version(conn):
+    """Incrementa la versión de los datos dentro de la transacción actual"""
+    conn.execute('''
+        INSERT INTO inventory_meta (clave, valor) VALUES ('data_version', '1')
+        ON CONFLICT(clave) DO UPDATE SET valor = CAST(valor AS INTEGER) + 1
+    ''')
 
-        # Limpiar y convertir datos
-        df['cantidad'] = pd.to_numeric(df['cantidad'], errors='coerce').fillna(0).astype(int)
-        df['precio'] = pd.to_numeric(df['precio'], errors='coerce').fillna(0)
+def _compute_inventory_stats(conn):
+    """Calcula en SQLite las estadísticas del inventario completo"""
+    row = conn.execute('''
+        SELECT COUNT(*), COALESCE(SUM(precio * cantidad), 0),
+               COALESCE(SUM(cantidad = 0), 0), COALESCE(SUM(cantidad < ?), 0),
+               MIN(precio), MAX(precio), AVG(precio)
+        FROM inventory
+    ''', (LOW_STOCK,)).fetchone()
+    top = conn.execute(
+        'SELECT producto, precio FROM inventory ORDER BY precio DESC LIMIT ?', (STATS_TOP_N,)
+    ).fetchall()
 
-        # Eliminar filas con valores nulos en columnas críticas
-        df = df.dropna(subset=['producto', 'codigo'])
+    return {
+        'total_productos': row[0],
+        'valor_inventario': row[1],
+        'agotados': row[2],
+        'stock_bajo': row[3],
+        'precio_min': row[4],
+        'precio_max': row[5],
+        'precio_promedio': row[6],
+        'top_precios': [list(item) for item in top]
+    }
 
-        # Guardar en la base de datos
-        conn = sqlite3.connect(DB_PATH)
+def _refresh_inventory_stats(conn):
+    """Recalcula y guarda las estadísticas dentro de la transacción actual"""
+    conn.execute(
+        "INSERT OR REPLACE INTO inventory_meta (clave, valor) VALUES ('stats', ?)",
+        (json.dumps(_compute_inventory_stats(conn)),)
+    )
 
-        # Eliminar datos existentes
-        conn.execute('DELETE FROM inventory')
+@timed()
+def get_inventory_stats():
+    """
+    Estadísticas precalculadas del inventario completo: total de productos,
+    valor (precio x cantidad), agotados, stock bajo, precios mínimo, máximo y
+    promedio y los productos más caros. Se leen de la base de datos una sola
+    vez por versión de los datos (y después de cada venta).
+    """
+    try:
+        version = (DB_PATH, get_data_version(), _last_movement(get_connection(DB_PATH)))
+        with _stats_lock:
+            if _stats['version'] == version:
+                return _stats['value']
 
-        # Insertar nuevos datos
-        df[required_columns].to_sql('inventory', conn, if_exists='append', index=False)
+            conn = get_connection(DB_PATH)
+            try:
+                row = conn.execute("SELECT valor FROM inventory_meta WHERE clave = 'stats'").fetchone()
+            except sqlite3.OperationalError:
+                # Bases de datos creadas antes de existir la tabla de metadatos
+                row = None
+            stats = json.loads(row[0]) if row else _compute_inventory_stats(conn)
 
-        conn.commit()
-        conn.close()
+            _stats['version'] = version
+            _stats['value'] = stats
+        return stats
+    except Exception as e:
+        print(f"Error al leer estadísticas del inventario: {str(e)}")
+        return None
 
-        return True
+def _normalize_codigo(codigos):
+    """Normaliza los códigos de producto para usarlos como clave"""
+    codigos = codigos.astype(str).str.strip()
+    # Excel entrega los códigos numéricos como flotantes ("2949.0")
+    codigos = codigos.str.replace(r'^(\d+)\.0+$', r'\1', regex=True)
+    # Los códigos numéricos se guardan sin ceros a la izquierda ("02949" -> "2949")
+    numeric = codigos.str.fullmatch(r'\d+')
+    codigos = codigos.where(~numeric, codigos.str.lstrip('0').replace('', '0'))
+    return codigos
+
+def _to_records(df):
+    """Convierte un DataFrame en tuplas para executemany, con NULL en lugar de NaN"""
+    return list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+
+def _insert_rows(conn, df, columns):
+    """Inserta (o reemplaza por código) las filas indicadas"""
+    placeholders = ', '.join('?' for _ in columns)
+    updates = ', '.join(f'{col} = excluded.{col}' for col in columns if col != 'codigo')
+    conn.executemany(
+        f'INSERT INTO inventory ({", ".join(columns)}) VALUES ({placeholders}) '
+        f'ON CONFLICT(codigo) DO UPDATE SET {updates}',
+        _to_records(df[columns])
+    )
+
+def _sniff_csv(file):
+    """Detecta la codificación y el separador a partir del inicio del archivo"""
+    file.seek(0)
+    prefix = file.read(SNIFF_BYTES)
+    file.seek(0)
+
+    # Si el prefijo quedó cortado, descartar la última línea (puede terminar a
+    # mitad de un carácter multibyte)
+    if len(prefix) == SNIFF_BYTES and b'\n' in prefix:
+        prefix = prefix.rsplit(b'\n', 1)[0]
+
+    text = ''
+    encoding = 'latin1'
+    for candidate in ['utf-8-sig', 'cp1252']:
+        try:
+            text = prefix.decode(candidate)
+            encoding = candidate
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        text = prefix.decode(encoding)
+
+    header = text.splitlines()[0] if text else ''
+    sep = max([',', ';', '\t'], key=header.count)
+    return encoding, sep
+
+def _iter_chunks(file, file_extension, chunksize):
+    """
+    Lee el archivo por bloques de filas sin cargarlo completo en memoria.
+    Genera tuplas (bloque, fracción leída); la fracción es None si no se conoce.
+    """
+    if file_extension == '.csv':
+        encoding, sep = _sniff_csv(file)
+        file.seek(0, os.SEEK_END)
+        total_bytes = file.tell()
+        file.seek(0)
+
+        reader = pd.read_csv(
+            file,
+            encoding=encoding,
+            encoding_errors='replace',
+            sep=sep,
+            dtype=str,
+            chunksize=chunksize
+        )
+        for chunk in reader:
+            yield chunk, (min(file.tell() / total_bytes, 1.0) if total_bytes else None)
+
+    elif file_extension == '.xlsx':
+        from openpyxl import load_workbook
+
+        file.seek(0)
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            rows = sheet.iter_rows(values_only=True)
+            header = [str(value) if value is not None else '' for value in next(rows, ())]
+            width = len(header)
+            total_rows = (sheet.max_row or 0) - 1
+
+            batch = []
+            read = 0
+            for row in rows:
+                batch.append(tuple(row[:width]) + (None,) * (width - len(row)))
+                if len(batch) >= chunksize:
+                    read += len(batch)
+                    yield pd.DataFrame(batch, columns=header), (read / total_rows if total_rows > 0 else None)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=header), 1.0
+        finally:
+            workbook.close()
+
+    elif file_extension == '.xls':
+        # El formato .xls antiguo no se puede leer por partes: se carga una vez
+        # y se procesa por bloques igual que los demás formatos
+        file.seek(0)
+        df = pd.read_excel(file, dtype=str)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize], min((start + chunksize) / len(df), 1.0)
+
+def _normalize_chunk(chunk):
+    """
+    Aplica el mapeo de columnas y la limpieza de datos a un bloque.
+    Retorna (bloque, columnas, filas descartadas, filas con valores
+    inválidos); el bloque es None si faltan columnas requeridas.
+    """
+    chunk = chunk.rename(columns=lambda col: str(col).strip().lower())
+    chunk = chunk.rename(columns=COLUMN_MAPPING)
 
+    # Asegurarse de que las columnas requeridas existan
+    if not all(col in chunk.columns for col in REQUIRED_COLUMNS):
+        return None, None, 0, 0
+    columns = REQUIRED_COLUMNS + [col for col in OPTIONAL_COLUMNS if col in chunk.columns]
+    chunk = chunk[columns].copy()
+
+    # Limpiar y convertir datos; los valores que no son números quedan en 0
+    cantidad = pd.to_numeric(chunk['cantidad'], errors='coerce')
+    precio = pd.to_numeric(chunk['precio'], errors='coerce')
+    invalidos = int(
+        ((cantidad.isna() & chunk['cantidad'].notna()) | (precio.isna() & chunk['precio'].notna())).sum()
+    )
+    chunk['cantidad'] = cantidad.fillna(0).astype(int)
+    chunk['precio'] = precio.fillna(0).astype(float)
+
+    # Eliminar filas con valores nulos en columnas críticas
+    total = len(chunk)
+    chunk = chunk.dropna(subset=['producto', 'codigo'])
+    descartados = total - len(chunk)
+
+    chunk['codigo'] = _normalize_codigo(chunk['codigo'])
+    for col in columns:
+        if col not in ('codigo', 'cantidad', 'precio'):
+            # Excel entrega textos numéricos como números
+            chunk[col] = chunk[col].where(chunk[col].isna(), chunk[col].astype(str))
+
+    # Un código repetido en el bloque se queda con su última aparición
+    chunk = chunk.drop_duplicates(subset='codigo', keep='last')
+    return chunk, columns, descartados, invalidos
+
+def _load_existing(conn, columns):
+    """Carga el inventario actual indexado por código para comparar"""
+    return pd.read_sql_query(
+        f'SELECT {", ".join(columns)} FROM inventory WHERE codigo IS NOT NULL', conn
+    ).set_index('codigo')
+
+def _upsert_chunk(conn, chunk, columns, existing, seen, stats):
+    """Escribe solo las filas nuevas o con cambios de un bloque"""
+    incoming = chunk[columns].set_index('codigo')
+
+    # Códigos que ya aparecieron en un bloque anterior del mismo archivo
+    repeated = pd.Series([codigo in seen for codigo in incoming.index], index=incoming.index, dtype=bool)
+    is_new = ~incoming.index.isin(existing.index) & ~repeated
+
+    # Comparar los productos existentes columna por columna
+    known = incoming[~is_new & ~repeated]
+    previous = existing.reindex(known.index)
+    changed = pd.Series(False, index=known.index)
+    for col in known.columns:
+        if col in ('cantidad', 'precio'):
+            changed |= pd.to_numeric(previous[col], errors='coerce').fillna(0) != known[col]
+        else:
+            changed |= previous[col].fillna('').astype(str) != known[col].fillna('').astype(str)
+
+    write = incoming[is_new | repeated]
+    write = pd.concat([write, known[changed]]).reset_index()
+    _insert_rows(conn, write, columns)
+
+    stats['insertados'] += int(is_new.sum())
+    stats['actualizados'] += int(repeated.sum()) + int(changed.sum())
+    stats['sin_cambios'] += int((~changed).sum())
+    seen.update(incoming.index)
+
+def import_file_to_db(file, mode='replace', delete_missing=False, progress=None, chunksize=CHUNK_SIZE, db_path=None):
+    """
+    Importa datos desde un archivo CSV o Excel a la base de datos.
+
+    El archivo se lee y se guarda por bloques de `chunksize` filas, de modo que
+    la memoria usada no depende del tamaño del archivo. Con mode='replace' el
+    inventario se reemplaza por completo. Con mode='upsert' solo se insertan
+    los productos nuevos y se actualizan los que cambiaron (por código);
+    delete_missing elimina además los productos que no aparecen en el archivo.
+    Si se indica, progress(filas_leidas, fraccion) se llama después de cada
+    bloque. db_path permite importar a otra base de datos distinta de DB_PATH.
+
+    Retorna un diccionario con los conteos de filas insertadas, actualizadas,
+    eliminadas, sin cambios, descartadas (sin producto o código) e inválidas
+    (cantidad o precio que no son números), o False si el archivo no se pudo
+    importar.
+    """
+    try:
+        return import_file(file, mode, delete_missing, progress, chunksize, db_path)
     except Exception as e:
         print(f"Error al importar archivo: {str(e)}")
         return False
 
+@timed()
+def import_file(file, mode='replace', delete_missing=False, progress=None, chunksize=CHUNK_SIZE, db_path=None):
+    """Igual que import_file_to_db, pero lanza la excepción si el archivo no se pudo importar"""
+    db_path = db_path or DB_PATH
+    # Determinar el tipo de archivo
+    file_extension = os.path.splitext(file.name)[1].lower()
+    if file_extension not in ['.csv', '.xls', '.xlsx']:
+        raise ValueError(f"Formato de archivo no soportado: {file_extension}")
+
+    stats = {
+        'insertados': 0, 'actualizados': 0, 'eliminados': 0, 'sin_cambios': 0,
+        'descartados': 0, 'invalidos': 0
+    }
+
+    # Una sola importación a la vez escribe en la base de datos, todo dentro
+    # de una única transacción
+    from utils.history import begin_import, record_import
+
+    with _import_lock:
+        initialize_database(db_path)
+        conn = get_connection(db_path)
+        try:
+            # Cantidad y precio previos, para registrar solo los cambios
+            begin_import(conn)
+
+            columns = None
+            existing = None
+            seen = set()
+            filas = 0
+
+            for raw_chunk, fraction in _iter_chunks(file, file_extension, chunksize):
+                chunk, chunk_columns, descartados, invalidos = _normalize_chunk(raw_chunk)
+                if chunk is None:
+                    raise ValueError("El archivo no contiene las columnas requeridas")
+
+                if columns is None:
+                    columns = chunk_columns
+                    if mode == 'upsert':
+                        existing = _load_existing(conn, columns)
+                    else:
+                        stats['eliminados'] = conn.execute('SELECT COUNT(*) FROM inventory').fetchone()[0]
+                        conn.execute('DELETE FROM inventory')
+
+                if mode == 'upsert':
+                    _upsert_chunk(conn, chunk, columns, existing, seen, stats)
+                else:
+                    _insert_rows(conn, chunk, columns)
+
+                stats['descartados'] += descartados
+                stats['invalidos'] += invalidos
+                filas += len(raw_chunk)
+                if progress is not None:
+                    progress(filas, fraction)
+
+            if columns is None:
+                raise ValueError("El archivo no contiene datos")
+
+            if mode == 'upsert':
+                if delete_missing:
+                    missing = [(codigo,) for codigo in existing.index if codigo not in seen]
+                    conn.executemany('DELETE FROM inventory WHERE codigo = ?', missing)
+                    stats['eliminados'] = len(missing)
+            else:
+                stats['insertados'] = conn.execute('SELECT COUNT(*) FROM inventory').fetchone()[0]
+
+            record_import(conn)
+            if stats['insertados'] or stats['actualizados'] or stats['eliminados']:
+                _refresh_inventory_stats(conn)
+                _bump_data_version(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        # Dejar lista la copia en memoria y la copia Arrow para los demás procesos
+        if stats['insertados'] or stats['actualizados'] or stats['eliminados']:
+            with _snapshot_lock:
+                _reload_snapshot(conn, db_path)
+
+    return stats
+
+def _is_locked(error):
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+def _adjust_inventory_stats(conn, cambios):
+    """
+    Ajusta las estadísticas guardadas con los cambios de stock de una venta,
+    sin recorrer la tabla. `cambios` es una lista de (precio, antes, despues).
+    """
+    row = conn.execute("SELECT valor FROM inventory_meta WHERE clave = 'stats'").fetchone()
+    if row is None:
+        _refresh_inventory_stats(conn)
+        return
+
+    stats = json.loads(row[0])
+    for precio, antes, despues in cambios:
+        stats['valor_inventario'] += (precio or 0) * (despues - antes)
+        stats['agotados'] += (despues == 0) - (antes == 0)
+        stats['stock_bajo'] += (despues < LOW_STOCK) - (antes < LOW_STOCK)
+    conn.execute("UPDATE inventory_meta SET valor = ? WHERE clave = 'stats'", (json.dumps(stats),))
+
+def _checkout_once(conn, items, venta_id, fecha):
+    from utils.history import maybe_checkpoint
+    from utils.sales import record_sales
+
+    # BEGIN IMMEDIATE toma el bloqueo de escritura al inicio, así la
+    # transacción no falla a mitad de camino por otra escritura
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        lineas = []
+        cambios = []
+        for codigo, item in items.items():
+            cantidad = item['cantidad']
+            # La condición cantidad >= n hace atómico el descuento del stock
+            updated = conn.execute(
+                'UPDATE inventory SET cantidad = cantidad - ? WHERE codigo = ? AND cantidad >= ?',
+                (cantidad, codigo, cantidad)
+            ).rowcount
+            if not updated:
+                conn.rollback()
+                row = conn.execute('SELECT cantidad FROM inventory WHERE codigo = ?', (codigo,)).fetchone()
+                if row is None:
+                    return {'exito': False, 'codigo': codigo, 'error': f"El producto {codigo} no existe"}
+                return {
+                    'exito': False,
+                    'codigo': codigo,
+                    'error': f"Stock insuficiente para {codigo}: disponible {row[0]}, solicitado {cantidad}"
+                }
+
+            producto, precio, restante, linea = conn.execute(
+                'SELECT producto, precio, cantidad, linea FROM inventory WHERE codigo = ?', (codigo,)
+            ).fetchone()
+            cambios.append((precio, restante + cantidad, restante))
+            lineas.append({
+                'codigo': codigo,
+                'producto': producto,
+                'categoria': linea,
+                'cantidad': cantidad,
+                'precio': item.get('precio', precio)
+            })
+
+        conn.executemany(
+            "INSERT INTO inventory_movements (fecha, codigo, delta_cantidad, origen) VALUES (?, ?, ?, 'venta')",
+            [(fecha, linea['codigo'], -linea['cantidad']) for linea in lineas]
+        )
+        # Las ventas también cuentan para la próxima copia del historial
+        maybe_checkpoint(conn)
+        record_sales(conn, lineas, venta_id, fecha)
+        _adjust_inventory_stats(conn, cambios)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return {
+        'exito': True,
+        'venta_id': venta_id,
+        'lineas': lineas,
+        'total': sum(linea['cantidad'] * linea['precio'] for linea in lineas)
+    }
+
+@timed()
+def checkout(items, venta_id=None, retries=CHECKOUT_RETRIES):
+    """
+    Registra una venta: descuenta el stock de cada línea y agrega las líneas
+    al libro de ventas en una sola transacción corta. Si algún producto no
+    tiene stock suficiente no se modifica nada.
+
+    `items` es una lista de diccionarios con codigo y cantidad (y
+    opcionalmente precio, si difiere del precio del inventario).
+
+    Retorna un diccionario con 'exito' y, según el caso, venta_id, lineas y
+    total o el error y el código del producto que lo causó.
+    """
+    # Agrupar líneas repetidas del mismo producto
+    agrupados = {}
+    for item in items:
+        codigo = str(item['codigo'])
+        cantidad = int(item['cantidad'])
+        if cantidad <= 0:
+            return {'exito': False, 'codigo': codigo, 'error': "La cantidad debe ser mayor que cero"}
+        if codigo in agrupados:
+            agrupados[codigo]['cantidad'] += cantidad
+        else:
+            agrupados[codigo] = dict(item, codigo=codigo, cantidad=cantidad)
+    if not agrupados:
+        return {'exito': False, 'codigo': None, 'error': "La venta no tiene productos"}
+
+    fecha = datetime.now().isoformat(timespec='seconds')
+    venta_id = venta_id or f"{fecha}-{random.getrandbits(32):08x}"
+    conn = get_connection(DB_PATH)
+
+    for intento in range(retries + 1):
+        try:
+            # Bases de datos sin el esquema actual (movimientos, metadatos, columna linea);
+            # con el esquema al día solo lee su versión
+            initialize_database()
+            return _checkout_once(conn, agrupados, venta_id, fecha)
+        except sqlite3.OperationalError as e:
+            if _is_locked(e) and intento < retries:
+                # Esperar con retroceso exponencial (y algo de azar) antes de reintentar
+                count('checkout.reintentos')
+                time.sleep(CHECKOUT_BACKOFF * 2 ** intento * (1 + random.random()))
+                continue
+            print(f"Error al registrar venta: {str(e)}")
+            if _is_locked(e):
+                return {'exito': False, 'codigo': None, 'error': "La base de datos está ocupada, intente de nuevo"}
+            return {'exito': False, 'codigo': None, 'error': str(e)}
+        except Exception as e:
+            print(f"Error al registrar venta: {str(e)}")
+            return {'exito': False, 'codigo': None, 'error': str(e)}
+
+def _arrow_path(db_path=None):
+    """Ruta de la copia columnar (Arrow IPC) del inventario, junto a la base de datos"""
+    return os.path.splitext(db_path or DB_PATH)[0] + '.arrow'
+
+def _write_arrow_snapshot(df, data_version, movimiento, db_path=None):
+    """
+    Guarda el inventario en formato Arrow IPC, etiquetado con la versión de
+    los datos. Se escribe en un archivo temporal y se renombra, así los
+    procesos que tienen abierta la copia anterior no se ven afectados.
+    """
+    try:
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b'data_version': str(data_version).encode(),
+            b'formato': str(SNAPSHOT_FORMAT).encode(),
+            b'movimiento': str(movimiento).encode()
+        })
+        path = _arrow_path(db_path)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Error al guardar la copia Arrow del inventario: {str(e)}")
+
+@timed()
+def _read_arrow_snapshot(data_version, total_productos=None):
+    """
+    Abre la copia Arrow con memoria mapeada (las columnas numéricas no se
+    copian). Retorna (df, movimiento) o None si no existe o está desactualizada.
+    """
+    path = _arrow_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        import pyarrow as pa
+
+        reader = pa.ipc.open_file(pa.memory_map(path, 'r'))
+        metadata = reader.schema.metadata or {}
+        if (
+            int(metadata.get(b'data_version', b'-1')) != data_version
+            or int(metadata.get(b'formato', b'1')) != SNAPSHOT_FORMAT
+        ):
+            return None
+        table = reader.read_all()
+        if total_productos is not None and table.num_rows != total_productos:
+            return None
+        return table.to_pandas(split_blocks=True), int(metadata.get(b'movimiento', b'0'))
+    except Exception as e:
+        print(f"Error al leer la copia Arrow del inventario: {str(e)}")
+        return None
+
+@timed()
+def _read_sqlite_snapshot(conn):
+    """
+    Lee la tabla, su versión y el último movimiento en la misma transacción
+    de lectura, para no aplicar dos veces una venta concurrente.
+    """
+    conn.execute('BEGIN')
+    try:
+        data_version = get_data_version(conn)
+        movimiento = _last_movement(conn)
+        df = pd.read_sql_query(f'SELECT {", ".join(INVENTORY_COLUMNS)} FROM inventory', conn)
+    finally:
+        conn.rollback()
+    return data_version, df, movimiento
+
+def compact_frame(df):
+    """
+    Retorna df con tipos compactos: categorías para las columnas de texto con
+    pocos valores distintos y enteros de 32 bits para la cantidad cuando todos
+    los valores son enteros. El precio conserva su tipo de 64 bits.
+    """
+    df = df.copy()
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and df[col].nunique() <= CATEGORY_MAX_RATIO * len(df):
+            df[col] = df[col].astype('category')
+
+    limit = np.iinfo(np.int32)
+    for col in INTEGER_COLUMNS:
+        if col not in df.columns or not pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        values = df[col].to_numpy(dtype=float)
+        # 32 bits (no el mínimo posible) para que las ventas no desborden el tipo
+        if (
+            np.isfinite(values).all()
+            and (values == np.round(values)).all()
+            and (len(values) == 0 or (values.min() >= limit.min and values.max() <= limit.max))
+        ):
+            df[col] = values.astype(np.int32)
+    return df
+
+def memory_report(df=None):
+    """
+    Memoria usada por cada columna de la copia en memoria comparada con la
+    que usaría con los tipos genéricos (texto como objetos y números de 64 bits).
+    """
+    if df is None:
+        df = load_data()
+        if df is None:
+            return None
+
+    rows = []
+    for col in df.columns:
+        actual = df[col].memory_usage(index=False, deep=True)
+        if isinstance(df[col].dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(df[col]):
+            generico = df[col].astype(object).memory_usage(index=False, deep=True)
+        else:
+            generico = len(df) * 8
+        rows.append({'columna': col, 'tipo': str(df[col].dtype), 'bytes': actual, 'bytes_generico': generico})
+
+    report = pd.DataFrame(rows)
+    report['ahorro'] = report['bytes_generico'] - report['bytes']
+    return report
+
+@timed()
+def _reload_snapshot(conn, db_path=None):
+    """Recarga la copia en memoria desde SQLite y reescribe la copia Arrow (con _snapshot_lock tomado)"""
+    db_path = db_path or DB_PATH
+    data_version, df, movimiento = _read_sqlite_snapshot(conn)
+    df = compact_frame(df)
+    _write_arrow_snapshot(df, data_version, movimiento, db_path)
+    _snapshot['version'] = (db_path, data_version)
+    _snapshot['df'] = df
+    _snapshot['movimiento'] = movimiento
+    _snapshot['positions'] = None
+    return df
+
+@timed()
 def load_data():
-    """Carga los datos desde la base de datos"""
+    """
+    Carga los datos desde la base de datos.
+    El DataFrame se reutiliza entre sesiones y páginas mientras la versión de
+    los datos no cambie, por lo que debe tratarse como de solo lectura. Las
+    ventas registradas desde la carga se aplican sobre la misma copia.
+
+    Al cambiar la versión se abre primero la copia Arrow del inventario y
+    solo si no existe o está desactualizada se lee SQLite.
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        df = pd.read_sql_query('SELECT * FROM inventory', conn)
-        conn.close()
-        return df
+        conn = get_connection(DB_PATH)
+        data_version = get_data_version()
+        version = (DB_PATH, data_version)
+        with _snapshot_lock:
+            if _snapshot['version'] != version:
+                stats = get_inventory_stats()
+                arrow = _read_arrow_snapshot(data_version, stats['total_productos'] if stats else None)
+                if arrow is None:
+                    return _reload_snapshot(conn)
+                _snapshot['version'] = version
+                _snapshot['df'], _snapshot['movimiento'] = arrow
+                count('snapshot.cargas_arrow')
+                _snapshot['positions'] = None
+
+            if _last_movement(conn) == _snapshot['movimiento'] or _apply_movements(conn):
+                return _snapshot['df']
+            return _reload_snapshot(conn)
     except:
-        return None
\ No newline at end of file
+        return None
+
+def _apply_movements(conn):
+    """
+    Aplica a la copia en memoria los movimientos de stock posteriores a su
+    carga. Retorna False si la copia no se puede actualizar y hay que recargarla.
+    """
+    rows = conn.execute('''
+        SELECT MAX(id), codigo, SUM(delta_cantidad) FROM inventory_movements
+        WHERE id > ? GROUP BY codigo
+    ''', (_snapshot['movimiento'],)).fetchall()
+    if not rows:
+        return True
+
+    df = _snapshot['df']
+    if _snapshot['positions'] is None:
+        _snapshot['positions'] = pd.Index(df['codigo'])
+    positions = _snapshot['positions'].get_indexer([codigo for _, codigo, _ in rows])
+    if (positions < 0).any():
+        return False
+
+    cantidades = df['cantidad'].to_numpy(copy=True)
+    cantidades[positions] += [delta for _, _, delta in rows]
+    df['cantidad'] = cantidades
+    _snapshot['movimiento'] = max(row[0] for row in rows)
+    count('snapshot.movimientos_aplicados', len(rows))
+    return True
+
+def get_derived(name, builder, df=None):
+    """
+    Retorna builder(df) calculado una sola vez por versión de los datos.
+    df debe ser el DataFrame retornado por load_data; si no se indica, se carga.
+    """
+    if df is None:
+        df = load_data()
+        if df is None:
+            return None
+
+    with _derived_lock:
+        entry = _derived.get(name)
+        if entry is not None and entry[0] is df:
+            return entry[1]
+        build_lock = _derived_builds.setdefault(name, threading.Lock())
+
+    # Otra sesión puede estar construyendo la misma estructura: esperarla
+    # en lugar de construirla dos veces
+    with build_lock:
+        with _derived_lock:
+            entry = _derived.get(name)
+            if entry is not None and entry[0] is df:
+                return entry[1]
+
+        value = builder(df)
+        with _derived_lock:
+            _derived[name] = (df, value)
+    return value
+
+# Columnas por las que se puede ordenar en query_inventory
+SORTABLE_COLUMNS = ['producto', 'referencia', 'codigo', 'cantidad', 'precio', 'nomb_marca', 'linea']
+
+def _fts_tokenizer(conn):
+    """Tokenizador del índice FTS5, o None si no existe"""
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'inventory_fts'"
+    ).fetchone()
+    if row is None:
+        return None
+    return 'trigram' if 'trigram' in row[0] else 'unicode61'
+
+def _inventory_filters(conn, search='', precio_min=None, precio_max=None, solo_disponibles=False, max_cantidad=None):
+    """Construye la cláusula WHERE (y sus parámetros) para los filtros de la página"""
+    clauses = []
+    params = []
+
+    search = (search or '').strip()
+    if search:
+        tokenizer = _fts_tokenizer(conn)
+        if tokenizer == 'trigram' and len(search) >= 3:
+            # Frase entre comillas: coincide como subcadena en cualquier columna
+            clauses.append('id IN (SELECT rowid FROM inventory_fts WHERE inventory_fts MATCH ?)')
+            params.append('"' + search.replace('"', '""') + '"')
+        elif tokenizer == 'unicode61' and search.replace('"', '').split():
+            # Sin trigramas solo se pueden buscar prefijos de palabras
+            terms = ['"' + word.replace('"', '""') + '"*' for word in search.split()]
+            clauses.append('id IN (SELECT rowid FROM inventory_fts WHERE inventory_fts MATCH ?)')
+            params.append(' AND '.join(terms))
+        else:
+            pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            clauses.append(
+                "(producto LIKE ? ESCAPE '\\' OR codigo LIKE ? ESCAPE '\\' OR referencia LIKE ? ESCAPE '\\')"
+            )
+            params.extend([pattern] * 3)
+
+    if precio_min is not None and precio_max is not None:
+        clauses.append('precio BETWEEN ? AND ?')
+        params.extend([precio_min, precio_max])
+    elif precio_min is not None:
+        clauses.append('precio >= ?')
+        params.append(precio_min)
+    elif precio_max is not None:
+        clauses.append('precio <= ?')
+        params.append(precio_max)
+
+    if solo_disponibles:
+        clauses.append('cantidad > 0')
+    if max_cantidad is not None:
+        clauses.append('cantidad < ?')
+        params.append(max_cantidad)
+
+    where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+    return where, params
+
+def fts_available():
+    """Indica si la base de datos tiene el índice de texto completo"""
+    try:
+        return _fts_tokenizer(get_connection(DB_PATH)) is not None
+    except sqlite3.Error:
+        return False
+
+@timed()
+def query_inventory(search='', precio_min=None, precio_max=None, solo_disponibles=False,
+                    max_cantidad=None, order_by=None, ascending=True, limit=None, offset=0):
+    """
+    Consulta el inventario aplicando los filtros en SQLite, de modo que solo
+    las filas que cumplen los filtros llegan a Python.
+    """
+    try:
+        conn = get_connection(DB_PATH)
+        where, params = _inventory_filters(
+            conn, search, precio_min, precio_max, solo_disponibles, max_cantidad
+        )
+        sql = f'SELECT {", ".join(INVENTORY_COLUMNS)} FROM inventory{where}'
+        if order_by in SORTABLE_COLUMNS:
+            sql += f' ORDER BY {order_by} {"ASC" if ascending else "DESC"}'
+        if limit is not None:
+            sql += ' LIMIT ? OFFSET ?'
+            params.extend([int(limit), int(offset)])
+        return pd.read_sql_query(sql, conn, params=params)
+    except Exception as e:
+        print(f"Error al consultar inventario: {str(e)}")
+        return None
+
+@timed()
+def summarize_inventory(search='', precio_min=None, precio_max=None, solo_disponibles=False):
+    """Métricas del inventario (con los mismos filtros de query_inventory) calculadas en SQLite"""
+    try:
+        conn = get_connection(DB_PATH)
+        where, params = _inventory_filters(conn, search, precio_min, precio_max, solo_disponibles)
+        row = conn.execute(f'''
+            SELECT COUNT(*), COALESCE(SUM(precio * cantidad), 0),
+                   COALESCE(SUM(cantidad = 0), 0), AVG(precio), MAX(precio)
+            FROM inventory{where}
+        ''', params).fetchone()
+        return {
+            'total_productos': row[0],
+            'valor_total': row[1],
+            'agotados': row[2],
+            'precio_promedio': row[3],
+            'precio_max': row[4]
+        }
+    except Exception as e:
+        print(f"Error al resumir inventario: {str(e)}")
+        return None
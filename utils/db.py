@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Ajustes de cada conexión SQLite: WAL permite leer mientras otra conexión
+# escribe y busy_timeout espera a que se libere el bloqueo en vez de fallar
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+    'cache_size': -20000  # KiB
+}
+
+# Conexiones SQLite libres que se conservan por archivo
+SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', '8'))
+
+_local = threading.local()
+
+# Conexiones SQLite libres del proceso: path -> lista de conexiones. Streamlit
+# ejecuta cada rerun en un hilo nuevo, así que sin el pool cada ejecución
+# abriría sus conexiones y aplicaría los PRAGMA otra vez
+_pool_lock = threading.RLock()
+_idle = {}
+
+def _apply_pragmas(conn):
+    for pragma, value in SQLITE_PRAGMAS.items():
+        conn.execute(f'PRAGMA {pragma} = {value}')
+
+def _acquire(path):
+    with _pool_lock:
+        idle = _idle.get(path)
+        if idle:
+            return idle.pop()
+    # Sin check_same_thread: la conexión pasa de un hilo a otro, pero nunca
+    # la usan dos hilos a la vez
+    conn = sqlite3.connect(path, check_same_thread=False)
+    _apply_pragmas(conn)
+    return conn
+
+def _release(path, conn):
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+    except sqlite3.Error:
+        conn.close()
+        return
+    with _pool_lock:
+        idle = _idle.setdefault(path, [])
+        if len(idle) < SQLITE_POOL_SIZE:
+            idle.append(conn)
+            return
+    conn.close()
+
+class _ThreadConnections(dict):
+    """Conexiones tomadas por un hilo; vuelven al pool cuando el hilo termina"""
+
+    def __del__(self):
+        for path, conn in self.items():
+            try:
+                _release(path, conn)
+            except Exception:
+                pass
+
+def get_connection(path):
+    """
+    Conexión SQLite del hilo actual a `path`. Se toma del pool del proceso la
+    primera vez que el hilo la pide y vuelve al pool cuando el hilo termina,
+    así que el llamador no debe cerrarla; las escrituras deben terminar con
+    commit o rollback (ver transaction).
+    """
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = _ThreadConnections()
+
+    conn = connections.get(path)
+    if conn is None:
+        conn = connections[path] = _acquire(path)
+    return conn
+
+def close_connections():
+    """Cierra las conexiones SQLite del hilo actual y las libres del pool"""
+    connections = getattr(_local, 'connections', None)
+    if connections:
+        for conn in connections.values():
+            conn.close()
+        connections.clear()
+    with _pool_lock:
+        idle = [conn for conns in _idle.values() for conn in conns]
+        _idle.clear()
+    for conn in idle:
+        conn.close()
+
+@contextmanager
+def transaction(path):
+    """Conexión del hilo actual dentro de una transacción (commit o rollback al salir)"""
+    conn = get_connection(path)
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
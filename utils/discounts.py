@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+
+from utils.data_manager import get_derived
+from utils.instrumentation import timed
+
+# Categorías de precio: (límite superior exclusivo, categoría, descuento
+# mínimo y máximo recomendados en %). La última debe terminar en infinito.
+DEFAULT_TIERS = [
+    (50000, 'pequeño', 1, 5),
+    (1200000, 'mediano', 5, 12),
+    (float('inf'), 'grande', 12, 15),
+]
+
+# Costo estimado como fracción del precio de venta
+DEFAULT_COST_RATIO = 0.6
+
+def _tier_arrays(tiers):
+    limits = np.array([tier[0] for tier in tiers], dtype=float)
+    names = np.array([tier[1] for tier in tiers], dtype=object)
+    minimos = np.array([tier[2] for tier in tiers], dtype=float)
+    maximos = np.array([tier[3] for tier in tiers], dtype=float)
+    return limits, names, minimos, maximos
+
+def tier_positions(precios, tiers=DEFAULT_TIERS):
+    """Posición en `tiers` de la categoría de cada precio"""
+    limits = _tier_arrays(tiers)[0]
+    positions = np.searchsorted(limits, np.asarray(precios, dtype=float), side='right')
+    return np.minimum(positions, len(tiers) - 1)
+
+def categorize_prices(precios, tiers=DEFAULT_TIERS):
+    """Categoría y rango de descuento recomendado para un arreglo de precios"""
+    _, names, minimos, maximos = _tier_arrays(tiers)
+    positions = tier_positions(precios, tiers)
+    return names[positions], minimos[positions], maximos[positions]
+
+def categorize_price(precio, tiers=DEFAULT_TIERS):
+    """Categoría y rango (mínimo, máximo) de descuento para un solo precio"""
+    position = int(tier_positions([precio], tiers)[0])
+    _, categoria, minimo, maximo = tiers[position]
+    return categoria, (minimo, maximo)
+
+def estimated_margin(porcentajes, cost_ratio=DEFAULT_COST_RATIO):
+    """Margen estimado (%) sobre el precio original después del descuento"""
+    return (1 - np.asarray(porcentajes, dtype=float) / 100 - cost_ratio) * 100
+
+def analyze_discounts(precios, porcentajes, tiers=DEFAULT_TIERS, cost_ratio=DEFAULT_COST_RATIO):
+    """
+    Analiza de una sola vez los descuentos de un arreglo de precios.
+    `porcentajes` puede ser un solo valor o un arreglo del mismo tamaño.
+    """
+    precios = np.asarray(precios, dtype=float)
+    porcentajes = np.broadcast_to(np.asarray(porcentajes, dtype=float), precios.shape)
+    categorias, minimos, maximos = categorize_prices(precios, tiers)
+
+    precio_final = precios * (1 - porcentajes / 100)
+    return pd.DataFrame({
+        'categoria': categorias,
+        'min_descuento': minimos,
+        'max_descuento': maximos,
+        'descuento': porcentajes,
+        'precio_final': precio_final,
+        'descuento_valor': precios - precio_final,
+        'margen_estimado': estimated_margin(porcentajes, cost_ratio),
+        'es_seguro': porcentajes <= maximos
+    })
+
+@timed()
+def discount_table(df, tiers=DEFAULT_TIERS, cost_ratio=DEFAULT_COST_RATIO):
+    """
+    Tabla de descuentos recomendados de todo el inventario, evaluada con el
+    descuento máximo recomendado de cada producto.
+    """
+    _, _, maximos = categorize_prices(df['precio'], tiers)
+    analisis = analyze_discounts(df['precio'], maximos, tiers, cost_ratio)
+    analisis.index = df.index
+
+    table = df[['producto', 'referencia', 'codigo', 'precio']].copy()
+    for col in ['categoria', 'min_descuento', 'max_descuento', 'precio_final', 'descuento_valor', 'margen_estimado']:
+        table[col] = analisis[col]
+    return table
+
+def policy_discounts(df, policy, tiers=DEFAULT_TIERS):
+    """
+    Porcentaje de descuento que una política asigna a cada fila de df.
+
+    Políticas soportadas:
+    - {'tipo': 'plano', 'descuento': 10}
+    - {'tipo': 'categoria', 'descuentos': {'pequeño': 3, 'mediano': 8, 'grande': 12}}
+    - {'tipo': 'reglas', 'columna': 'linea' o 'nomb_marca',
+       'descuentos': {valor: porcentaje}, 'defecto': 0}
+    """
+    tipo = policy.get('tipo', 'plano')
+
+    if tipo == 'plano':
+        return np.full(len(df), float(policy.get('descuento', 0)))
+
+    if tipo == 'categoria':
+        por_categoria = policy.get('descuentos', {})
+        valores = np.array([float(por_categoria.get(tier[1], 0)) for tier in tiers])
+        return valores[tier_positions(df['precio'], tiers)]
+
+    if tipo == 'reglas':
+        columna = policy['columna']
+        defecto = float(policy.get('defecto', 0))
+        if columna not in df.columns:
+            return np.full(len(df), defecto)
+        return (
+            df[columna].map(policy.get('descuentos', {}))
+            .astype(float)
+            .fillna(defecto)
+            .to_numpy()
+        )
+
+    raise ValueError(f"Tipo de política desconocido: {tipo}")
+
+@timed()
+def simulate_promotion(df, policy, tiers=DEFAULT_TIERS, cost_ratio=DEFAULT_COST_RATIO):
+    """
+    Aplica una política de descuentos a df (todo el catálogo o un subconjunto)
+    en una sola pasada vectorizada. Retorna (resumen, detalle por producto).
+
+    Los ingresos se calculan sobre las unidades disponibles (cantidades
+    negativas cuentan como cero).
+    """
+    porcentajes = policy_discounts(df, policy, tiers)
+    analisis = analyze_discounts(df['precio'], porcentajes, tiers, cost_ratio)
+    analisis.index = df.index
+
+    unidades = np.clip(df['cantidad'].to_numpy(dtype=float), 0, None)
+    ingresos_originales = df['precio'].to_numpy(dtype=float) * unidades
+    ingresos_promocion = analisis['precio_final'].to_numpy() * unidades
+
+    margenes = analisis['margen_estimado'].to_numpy()
+    peso = ingresos_promocion.sum()
+    resumen = {
+        'productos': len(df),
+        'ingresos_originales': float(ingresos_originales.sum()),
+        'ingresos_promocion': float(ingresos_promocion.sum()),
+        'ingresos_en_riesgo': float(ingresos_originales.sum() - ingresos_promocion.sum()),
+        'descuentos_inseguros': int((~analisis['es_seguro']).sum()),
+        'margen_promedio': float(margenes.mean()) if len(margenes) else 0.0,
+        'margen_ponderado': float((margenes * ingresos_promocion).sum() / peso) if peso else 0.0,
+        'margen_percentiles': (
+            dict(zip(['p10', 'p50', 'p90'], np.percentile(margenes, [10, 50, 90]).tolist()))
+            if len(margenes) else {}
+        )
+    }
+
+    detalle = df[['producto', 'codigo', 'precio', 'cantidad']].copy()
+    for col in ['categoria', 'max_descuento', 'descuento', 'precio_final', 'margen_estimado', 'es_seguro']:
+        detalle[col] = analisis[col]
+    return resumen, detalle
+
+@timed()
+def sweep_discounts(df, niveles, tiers=DEFAULT_TIERS, cost_ratio=DEFAULT_COST_RATIO):
+    """
+    Evalúa un descuento plano para cada valor de `niveles` sobre df sin
+    recorrer la grilla producto por producto: los ingresos escalan linealmente
+    con el descuento y los descuentos inseguros se cuentan con búsqueda binaria
+    sobre los máximos recomendados ordenados.
+    """
+    niveles = np.asarray(niveles, dtype=float)
+    unidades = np.clip(df['cantidad'].to_numpy(dtype=float), 0, None)
+    ingresos = float((df['precio'].to_numpy(dtype=float) * unidades).sum())
+
+    _, _, maximos = categorize_prices(df['precio'], tiers)
+    maximos = np.sort(maximos)
+
+    return pd.DataFrame({
+        'descuento': niveles,
+        'ingresos_promocion': ingresos * (1 - niveles / 100),
+        'ingresos_en_riesgo': ingresos * niveles / 100,
+        # Un descuento es inseguro si supera el máximo recomendado del producto
+        'descuentos_inseguros': np.searchsorted(maximos, niveles, side='left'),
+        'margen_estimado': estimated_margin(niveles, cost_ratio)
+    })
+
+def get_discount_table(df=None):
+    """Tabla de descuentos con las categorías por defecto, calculada una vez por versión de los datos"""
+    return get_derived('discount_table', discount_table, df)
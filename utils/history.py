@@ -0,0 +1,245 @@
+from datetime import datetime
+
+import pandas as pd
+
+from utils import data_manager
+from utils.db import get_connection
+
+# Se guarda una copia completa del inventario cuando los movimientos desde la
+# anterior igualan esta fracción del catálogo: reconstruir una fecha nunca
+# recorre más movimientos que productos tiene el catálogo, y el espacio de
+# las copias crece con los cambios y no con la cantidad de importaciones
+CHECKPOINT_RATIO = 1.0
+
+HISTORY_SCHEMA = [
+    'CREATE INDEX IF NOT EXISTS idx_movements_codigo ON inventory_movements(codigo, id)',
+    '''CREATE TABLE IF NOT EXISTS inventory_checkpoints
+       (id INTEGER PRIMARY KEY, fecha TEXT, movimiento INTEGER, productos INTEGER)''',
+    '''CREATE TABLE IF NOT EXISTS inventory_checkpoint_rows
+       (checkpoint_id INTEGER, codigo TEXT, cantidad INTEGER, precio REAL,
+        PRIMARY KEY (checkpoint_id, codigo)) WITHOUT ROWID'''
+]
+
+def ensure_history_tables(conn):
+    """
+    Agrega el cambio de precio a los movimientos de stock y crea las tablas
+    de copias completas (checkpoints) del inventario.
+    """
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(inventory_movements)')]
+    if 'delta_precio' not in columns:
+        conn.execute('ALTER TABLE inventory_movements ADD COLUMN delta_precio REAL DEFAULT 0')
+    # Sentencias separadas (no executescript) para no confirmar la transacción en curso
+    for statement in HISTORY_SCHEMA:
+        conn.execute(statement)
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+def create_checkpoint(conn, fecha=None):
+    """Guarda una copia de cantidad y precio de todo el inventario, dentro de la transacción de `conn`"""
+    checkpoint_id = conn.execute('''
+        INSERT INTO inventory_checkpoints (fecha, movimiento, productos)
+        VALUES (?, (SELECT COALESCE(MAX(id), 0) FROM inventory_movements),
+                (SELECT COUNT(*) FROM inventory WHERE codigo IS NOT NULL))
+    ''', (fecha or _now(),)).lastrowid
+    conn.execute('''
+        INSERT INTO inventory_checkpoint_rows (checkpoint_id, codigo, cantidad, precio)
+        SELECT ?, codigo, cantidad, precio FROM inventory WHERE codigo IS NOT NULL
+    ''', (checkpoint_id,))
+    return checkpoint_id
+
+def ensure_checkpoint(conn):
+    """Crea la primera copia (el punto de partida del historial) si aún no existe"""
+    ensure_history_tables(conn)
+    if conn.execute('SELECT 1 FROM inventory_checkpoints LIMIT 1').fetchone() is None:
+        create_checkpoint(conn)
+
+def maybe_checkpoint(conn):
+    """
+    Crea una copia si los movimientos desde la última igualan CHECKPOINT_RATIO
+    veces los productos de esa copia. Solo lee la última copia y el último id
+    de movimiento, así que se puede llamar en cada venta (dentro de su transacción).
+    """
+    row = conn.execute(
+        'SELECT movimiento, productos FROM inventory_checkpoints ORDER BY id DESC LIMIT 1'
+    ).fetchone()
+    if row is None:
+        return
+    ultimo, productos = row
+    pendientes = conn.execute('SELECT COALESCE(MAX(id), 0) FROM inventory_movements').fetchone()[0] - ultimo
+    if pendientes > 0 and pendientes >= max(productos or 0, 1) * CHECKPOINT_RATIO:
+        create_checkpoint(conn)
+
+def begin_import(conn):
+    """
+    Guarda cantidad y precio antes de una importación en una tabla temporal,
+    para registrar después solo lo que cambió. Se llama dentro de la
+    transacción de la importación, antes de modificar el inventario.
+    """
+    ensure_checkpoint(conn)
+    conn.execute('DROP TABLE IF EXISTS temp.inventario_previo')
+    conn.execute('''
+        CREATE TEMP TABLE inventario_previo
+        (codigo TEXT PRIMARY KEY, cantidad INTEGER, precio REAL) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        INSERT INTO inventario_previo (codigo, cantidad, precio)
+        SELECT codigo, cantidad, precio FROM inventory WHERE codigo IS NOT NULL
+    ''')
+
+def record_import(conn, fecha=None):
+    """
+    Registra como movimientos las diferencias de cantidad y precio entre el
+    inventario guardado por begin_import y el actual: 'importacion' para los
+    productos que cambiaron, 'alta' para los nuevos y 'baja' para los
+    eliminados. Retorna la cantidad de movimientos.
+    """
+    fecha = fecha or _now()
+    movimientos = conn.execute('''
+        INSERT INTO inventory_movements (fecha, codigo, delta_cantidad, delta_precio, origen)
+        SELECT ?, i.codigo, i.cantidad - p.cantidad, i.precio - p.precio, 'importacion'
+        FROM inventory i JOIN inventario_previo p ON p.codigo = i.codigo
+        WHERE i.cantidad IS NOT p.cantidad OR i.precio IS NOT p.precio
+    ''', (fecha,)).rowcount
+    movimientos += conn.execute('''
+        INSERT INTO inventory_movements (fecha, codigo, delta_cantidad, delta_precio, origen)
+        SELECT ?, i.codigo, i.cantidad, i.precio, 'alta'
+        FROM inventory i LEFT JOIN inventario_previo p ON p.codigo = i.codigo
+        WHERE i.codigo IS NOT NULL AND p.codigo IS NULL
+    ''', (fecha,)).rowcount
+    movimientos += conn.execute('''
+        INSERT INTO inventory_movements (fecha, codigo, delta_cantidad, delta_precio, origen)
+        SELECT ?, p.codigo, -p.cantidad, -p.precio, 'baja'
+        FROM inventario_previo p LEFT JOIN inventory i ON i.codigo = p.codigo
+        WHERE i.codigo IS NULL
+    ''', (fecha,)).rowcount
+    conn.execute('DROP TABLE temp.inventario_previo')
+
+    maybe_checkpoint(conn)
+    return movimientos
+
+def _has_history(conn):
+    """Indica si la base de datos ya tiene el historial (lo crea initialize_database)"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'inventory_checkpoints'"
+    ).fetchone() is not None
+
+def _nearest_checkpoint(conn, fecha):
+    return conn.execute('''
+        SELECT id, movimiento FROM inventory_checkpoints
+        WHERE fecha <= ? ORDER BY fecha DESC, id DESC LIMIT 1
+    ''', (fecha,)).fetchone()
+
+def _fecha(fecha):
+    """Fecha ISO comparable con las guardadas; una fecha sin hora incluye todo el día"""
+    if isinstance(fecha, datetime):
+        return fecha.isoformat(timespec='seconds')
+    fecha = str(fecha)
+    return fecha if 'T' in fecha else f'{fecha}T23:59:59'
+
+def inventory_at(fecha):
+    """
+    Cantidad y precio de cada producto en `fecha`: se parte de la copia más
+    cercana anterior y se suman solo los movimientos posteriores a ella.
+    Retorna un DataFrame (codigo, producto, cantidad, precio) o None si la
+    fecha es anterior al inicio del historial.
+    """
+    try:
+        fecha = _fecha(fecha)
+        conn = get_connection(data_manager.DB_PATH)
+        if not _has_history(conn):
+            return None
+        checkpoint = _nearest_checkpoint(conn, fecha)
+        if checkpoint is None:
+            return None
+        checkpoint_id, movimiento = checkpoint
+
+        base = pd.read_sql_query(
+            'SELECT codigo, cantidad, precio FROM inventory_checkpoint_rows WHERE checkpoint_id = ?',
+            conn, params=(checkpoint_id,)
+        ).set_index('codigo')
+        base['existe'] = True
+
+        cambios = pd.read_sql_query('''
+            SELECT codigo,
+                   SUM(delta_cantidad) AS delta_cantidad,
+                   SUM(COALESCE(delta_precio, 0)) AS delta_precio,
+                   COALESCE(MAX(CASE WHEN origen = 'alta' THEN id END), 0) AS ultima_alta,
+                   COALESCE(MAX(CASE WHEN origen = 'baja' THEN id END), 0) AS ultima_baja
+            FROM inventory_movements
+            WHERE id > ? AND fecha <= ?
+            GROUP BY codigo
+        ''', conn, params=(movimiento, fecha)).set_index('codigo')
+
+        estado = base.reindex(base.index.union(cambios.index))
+        estado['existe'] = estado['existe'].eq(True)
+        estado[['cantidad', 'precio']] = estado[['cantidad', 'precio']].fillna(0)
+        if not cambios.empty:
+            estado.loc[cambios.index, 'cantidad'] += cambios['delta_cantidad']
+            estado.loc[cambios.index, 'precio'] += cambios['delta_precio']
+            # El último alta o baja posterior a la copia decide si el producto existía
+            eventos = cambios[(cambios['ultima_alta'] > 0) | (cambios['ultima_baja'] > 0)]
+            estado.loc[eventos.index, 'existe'] = eventos['ultima_alta'] > eventos['ultima_baja']
+
+        estado = estado[estado['existe']].drop(columns='existe')
+        estado['cantidad'] = estado['cantidad'].astype(int)
+
+        # Nombre del producto según el inventario actual (si aún existe)
+        nombres = pd.read_sql_query('SELECT codigo, producto FROM inventory', conn).set_index('codigo')['producto']
+        estado.insert(0, 'producto', nombres.reindex(estado.index))
+        return estado.reset_index()[['codigo', 'producto', 'cantidad', 'precio']]
+    except Exception as e:
+        print(f"Error al reconstruir el inventario: {str(e)}")
+        return None
+
+def stock_at(codigo, fecha):
+    """
+    Cantidad y precio de un producto en `fecha`, como diccionario. Retorna
+    None si el producto no existía o la fecha es anterior al historial.
+    """
+    try:
+        fecha = _fecha(fecha)
+        conn = get_connection(data_manager.DB_PATH)
+        if not _has_history(conn):
+            return None
+        checkpoint = _nearest_checkpoint(conn, fecha)
+        if checkpoint is None:
+            return None
+        checkpoint_id, movimiento = checkpoint
+        # Mismo formato con que las importaciones guardan el código ("02949" o "2949.0" -> "2949")
+        codigo = data_manager._normalize_codigo(pd.Series([str(codigo)])).iloc[0]
+
+        row = conn.execute(
+            'SELECT cantidad, precio FROM inventory_checkpoint_rows WHERE checkpoint_id = ? AND codigo = ?',
+            (checkpoint_id, codigo)
+        ).fetchone()
+        existe = row is not None
+        cantidad, precio = row if existe else (0, 0.0)
+
+        movimientos = conn.execute('''
+            SELECT delta_cantidad, COALESCE(delta_precio, 0), origen FROM inventory_movements
+            WHERE codigo = ? AND id > ? AND fecha <= ? ORDER BY id
+        ''', (codigo, movimiento, fecha)).fetchall()
+        for delta_cantidad, delta_precio, origen in movimientos:
+            cantidad += delta_cantidad
+            precio += delta_precio
+            if origen in ('alta', 'baja'):
+                existe = origen == 'alta'
+
+        if not existe:
+            return None
+        return {'codigo': codigo, 'cantidad': int(cantidad), 'precio': float(precio)}
+    except Exception as e:
+        print(f"Error al consultar el historial de {codigo}: {str(e)}")
+        return None
+
+def history_start():
+    """Fecha de la primera copia (inicio del historial), o None si aún no hay historial"""
+    try:
+        conn = get_connection(data_manager.DB_PATH)
+        if not _has_history(conn):
+            return None
+        return conn.execute('SELECT MIN(fecha) FROM inventory_checkpoints').fetchone()[0]
+    except Exception as e:
+        print(f"Error al consultar el inicio del historial: {str(e)}")
+        return None
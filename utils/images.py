@@ -0,0 +1,137 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+# Tamaño máximo de las miniaturas guardadas en caché
+THUMBNAIL_SIZE = (400, 300)
+
+# Segundos de espera por cada descarga
+REQUEST_TIMEOUT = 10
+
+# Descargas simultáneas (y conexiones en el pool de la sesión HTTP)
+MAX_WORKERS = 6
+
+# Miniaturas decodificadas que se guardan en memoria y en disco
+MEMORY_CACHE_SIZE = 128
+DISK_CACHE_SIZE = 1000
+CACHE_DIR = os.path.join('.cache', 'images')
+
+_session = None
+_executor = None
+_lock = threading.Lock()
+_memory_cache = OrderedDict()
+
+def _get_session():
+    """Sesión HTTP compartida, con un pool de conexiones del tamaño de MAX_WORKERS"""
+    global _session
+    with _lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='images')
+        return _executor
+
+def _cache_path(url):
+    return os.path.join(CACHE_DIR, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.jpg')
+
+def _remember(url, data):
+    """Guarda la miniatura en la caché en memoria, descartando la menos usada"""
+    with _lock:
+        _memory_cache[url] = data
+        _memory_cache.move_to_end(url)
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+def _from_cache(url):
+    """Busca la miniatura en memoria y luego en disco"""
+    with _lock:
+        data = _memory_cache.get(url)
+        if data is not None:
+            _memory_cache.move_to_end(url)
+            return data
+
+    path = _cache_path(url)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        os.utime(path)  # Marca de uso para el descarte en disco
+    except OSError:
+        return None
+    _remember(url, data)
+    return data
+
+def _prune_disk_cache():
+    """Elimina las miniaturas menos usadas cuando la caché en disco se llena"""
+    try:
+        entries = [os.path.join(CACHE_DIR, name) for name in os.listdir(CACHE_DIR)]
+        if len(entries) <= DISK_CACHE_SIZE:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:len(entries) - DISK_CACHE_SIZE]:
+            os.remove(path)
+    except OSError:
+        pass
+
+def make_thumbnail(content, size=THUMBNAIL_SIZE):
+    """Decodifica una imagen y retorna una miniatura JPEG (bytes)"""
+    from PIL import Image
+
+    with Image.open(BytesIO(content)) as img:
+        img = img.convert('RGB')
+        img.thumbnail(size)
+        output = BytesIO()
+        img.save(output, format='JPEG', quality=85)
+    return output.getvalue()
+
+def _download(url, timeout):
+    response = _get_session().get(url, timeout=timeout)
+    response.raise_for_status()
+    data = make_thumbnail(response.content)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(_cache_path(url), 'wb') as f:
+        f.write(data)
+    _prune_disk_cache()
+    _remember(url, data)
+    return data
+
+def fetch_image(url, timeout=REQUEST_TIMEOUT):
+    """Miniatura (JPEG en bytes) de la imagen en `url`, o None si no se pudo obtener"""
+    data = _from_cache(url)
+    if data is not None:
+        return data
+    try:
+        return _download(url, timeout)
+    except Exception as e:
+        print(f"Error al descargar imagen {url}: {str(e)}")
+        return None
+
+def fetch_images(urls, timeout=REQUEST_TIMEOUT):
+    """
+    Miniaturas de varias imágenes, en el mismo orden de `urls`. Las que no
+    están en caché se descargan de forma simultánea, así que el tiempo total
+    es aproximadamente el de la descarga más lenta.
+    """
+    results = [_from_cache(url) for url in urls]
+    missing = [i for i, data in enumerate(results) if data is None]
+    if missing:
+        executor = _get_executor()
+        futures = {i: executor.submit(fetch_image, urls[i], timeout) for i in missing}
+        for i, future in futures.items():
+            results[i] = future.result()
+    return results
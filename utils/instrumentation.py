@@ -0,0 +1,176 @@
+import io
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+# Se puede desactivar con INSTRUMENTACION=0 (los decoradores quedan sin efecto)
+ENABLED = os.environ.get('INSTRUMENTACION', '1') != '0'
+
+# Duraciones guardadas por métrica: las más antiguas se descartan
+WINDOW = 1000
+
+# Perfiles de ejecuciones completas de página que se conservan
+MAX_PROFILES = 5
+
+_lock = threading.Lock()
+_timings = {}   # nombre -> [llamadas, segundos totales, deque de duraciones recientes]
+_counters = {}  # nombre -> valor
+
+# Página cuya próxima ejecución se debe perfilar y perfiles ya capturados
+_profile_request = {'pagina': None}
+_profiles = deque(maxlen=MAX_PROFILES)
+
+def record(name, seconds):
+    """Agrega una duración (en segundos) a la métrica `name`"""
+    with _lock:
+        entry = _timings.get(name)
+        if entry is None:
+            entry = _timings[name] = [0, 0.0, deque(maxlen=WINDOW)]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2].append(seconds)
+
+def count(name, value=1):
+    """Suma `value` al contador `name`"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+@contextmanager
+def track(name):
+    """Mide la duración del bloque como la métrica `name`"""
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+def timed(name=None):
+    """Decorador que mide cada llamada de la función (por defecto con su nombre calificado)"""
+    def decorator(func):
+        if not ENABLED:
+            return func
+        metric = name or f"{func.__module__.split('.')[-1]}.{func.__name__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(metric, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def page(name):
+    """
+    Decorador para el main() de una página: mide cada ejecución como
+    'pagina.<name>' y la perfila con cProfile si se pidió con request_profile.
+    """
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _lock:
+                perfilar = _profile_request['pagina'] == name
+                if perfilar:
+                    _profile_request['pagina'] = None
+            if not perfilar:
+                with track(f'pagina.{name}'):
+                    return func(*args, **kwargs)
+
+            import cProfile
+
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            try:
+                return profiler.runcall(func, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                record(f'pagina.{name}', elapsed)
+                _store_profile(name, profiler, elapsed)
+        return wrapper
+    return decorator
+
+def _store_profile(name, profiler, elapsed):
+    import marshal
+    import pstats
+
+    profiler.create_stats()
+    texto = io.StringIO()
+    pstats.Stats(profiler, stream=texto).sort_stats('cumulative').print_stats(40)
+    with _lock:
+        _profiles.appendleft({
+            'pagina': name,
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'segundos': elapsed,
+            'resumen': texto.getvalue(),
+            # Mismo formato que cProfile.Profile.dump_stats (se abre con pstats o snakeviz)
+            'prof': marshal.dumps(profiler.stats)
+        })
+
+def request_profile(name):
+    """Perfila la próxima ejecución de la página `name` (de cualquier sesión)"""
+    with _lock:
+        _profile_request['pagina'] = name
+
+def pending_profile():
+    with _lock:
+        return _profile_request['pagina']
+
+def profiles():
+    """Perfiles capturados, del más reciente al más antiguo"""
+    with _lock:
+        return list(_profiles)
+
+def durations(name):
+    """Duraciones recientes (segundos) de una métrica"""
+    with _lock:
+        entry = _timings.get(name)
+        return np.array(entry[2]) if entry is not None else np.empty(0)
+
+def summary():
+    """
+    DataFrame con una fila por métrica: llamadas, tiempo total y percentiles
+    (en milisegundos) de las últimas WINDOW llamadas.
+    """
+    with _lock:
+        entries = [(name, calls, total, np.array(recent)) for name, (calls, total, recent) in _timings.items()]
+
+    rows = []
+    for name, calls, total, recent in entries:
+        p50, p90, p99 = np.percentile(recent, [50, 90, 99]) * 1000
+        rows.append({
+            'metrica': name,
+            'llamadas': calls,
+            'total_s': total,
+            'p50_ms': p50,
+            'p90_ms': p90,
+            'p99_ms': p99,
+            'max_ms': recent.max() * 1000
+        })
+    columns = ['metrica', 'llamadas', 'total_s', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms']
+    return pd.DataFrame(rows, columns=columns).sort_values('total_s', ascending=False, ignore_index=True)
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+def reset():
+    """Borra las métricas, contadores y perfiles acumulados"""
+    with _lock:
+        _timings.clear()
+        _counters.clear()
+        _profiles.clear()
+        _profile_request['pagina'] = None
@@ -0,0 +1,169 @@
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from utils import data_manager
+from utils.db import get_connection, transaction
+
+# Archivos subidos a la espera de ser importados
+UPLOAD_DIR = os.path.join('.cache', 'imports')
+
+# Cada cuántos segundos el proceso que ejecuta una importación confirma que
+# sigue vivo, y después de cuánto tiempo sin confirmarlo se la considera
+# abandonada (el proceso que la ejecutaba se detuvo)
+HEARTBEAT_SECONDS = 10
+STALE_SECONDS = 60
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Bases de datos de trabajos en las que ya se creó la tabla
+_ready = set()
+
+def _get_executor():
+    """Un solo hilo de trabajo: las importaciones se ejecutan en orden, una a la vez"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='imports')
+        return _executor
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+def jobs_path(db_path=None):
+    """
+    Base de datos de los trabajos, junto a la del inventario. Es un archivo
+    aparte para que encolar trabajos y guardar su avance no espere al
+    bloqueo de escritura que la importación mantiene sobre el inventario.
+    """
+    return os.path.splitext(db_path or data_manager.DB_PATH)[0] + '.jobs.db'
+
+def _connection(path):
+    conn = get_connection(path)
+    if path not in _ready:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS import_jobs
+            (id TEXT PRIMARY KEY, archivo TEXT, modo TEXT, eliminar_faltantes INTEGER, estado TEXT,
+             filas_leidas INTEGER DEFAULT 0, fraccion REAL, insertados INTEGER, actualizados INTEGER,
+             eliminados INTEGER, sin_cambios INTEGER, descartados INTEGER, invalidos INTEGER,
+             error TEXT, creado TEXT, actualizado TEXT)
+        ''')
+        conn.commit()
+        _ready.add(path)
+    return conn
+
+def submit_import(nombre, contenido, mode='replace', delete_missing=False):
+    """
+    Encola la importación de un archivo (nombre y contenido en bytes) y
+    retorna el id del trabajo sin esperar a que termine.
+    """
+    job_id = uuid.uuid4().hex
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(UPLOAD_DIR, job_id + os.path.splitext(nombre)[1].lower())
+    with open(path, 'wb') as f:
+        f.write(contenido)
+
+    db_path = data_manager.DB_PATH
+    _connection(jobs_path(db_path))
+    with transaction(jobs_path(db_path)) as conn:
+        conn.execute('''
+            INSERT INTO import_jobs (id, archivo, modo, eliminar_faltantes, estado, creado, actualizado)
+            VALUES (?, ?, ?, ?, 'pendiente', ?, ?)
+        ''', (job_id, nombre, mode, int(delete_missing), _now(), _now()))
+
+    _get_executor().submit(_run_job, job_id, path, db_path)
+    return job_id
+
+def _claim(path, job_id):
+    """
+    Marca el trabajo como en proceso si ningún otro lo está, de modo que
+    aunque haya varios procesos solo una importación escribe a la vez.
+    """
+    limite = (datetime.now() - timedelta(seconds=STALE_SECONDS)).isoformat(timespec='seconds')
+    try:
+        with transaction(path) as conn:
+            conn.execute('''
+                UPDATE import_jobs SET estado = 'fallido', error = 'Importación interrumpida', actualizado = ?
+                WHERE estado = 'en_proceso' AND actualizado < ?
+            ''', (_now(), limite))
+            return conn.execute('''
+                UPDATE import_jobs SET estado = 'en_proceso', actualizado = ?
+                WHERE id = ? AND NOT EXISTS (SELECT 1 FROM import_jobs WHERE estado = 'en_proceso')
+            ''', (_now(), job_id)).rowcount == 1
+    except data_manager.sqlite3.OperationalError as e:
+        # Otro proceso está escribiendo en los trabajos: esperar el turno
+        if data_manager._is_locked(e):
+            return False
+        raise
+
+def _update(path, job_id, **campos):
+    campos['actualizado'] = _now()
+    asignaciones = ', '.join(f'{campo} = ?' for campo in campos)
+    with transaction(path) as conn:
+        conn.execute(f'UPDATE import_jobs SET {asignaciones} WHERE id = ?', (*campos.values(), job_id))
+
+def _heartbeat(path, job_id, terminado):
+    """Renueva la fecha de actualización del trabajo mientras se ejecuta"""
+    while not terminado.wait(HEARTBEAT_SECONDS):
+        try:
+            _update(path, job_id)
+        except data_manager.sqlite3.Error as e:
+            print(f"Error al actualizar el trabajo {job_id}: {str(e)}")
+
+def _run_job(job_id, path, db_path):
+    jobs_db = jobs_path(db_path)
+    conn = _connection(jobs_db)
+    terminado = threading.Event()
+    filas_leidas = 0
+    try:
+        while not _claim(jobs_db, job_id):
+            threading.Event().wait(1.0)
+
+        modo, eliminar_faltantes = conn.execute(
+            'SELECT modo, eliminar_faltantes FROM import_jobs WHERE id = ?', (job_id,)
+        ).fetchone()
+
+        threading.Thread(
+            target=_heartbeat, args=(jobs_db, job_id, terminado), name=f'import-{job_id[:8]}', daemon=True
+        ).start()
+
+        # El avance se guarda en la base de datos de trabajos, que la
+        # transacción de la importación no bloquea
+        def avance(filas, fraccion):
+            nonlocal filas_leidas
+            filas_leidas = filas
+            _update(jobs_db, job_id, filas_leidas=filas, fraccion=fraccion)
+
+        with open(path, 'rb') as f:
+            resultado = data_manager.import_file(
+                f, mode=modo, delete_missing=bool(eliminar_faltantes), progress=avance, db_path=db_path
+            )
+        _update(jobs_db, job_id, estado='completado', filas_leidas=filas_leidas, fraccion=1.0, **resultado)
+    except Exception as e:
+        print(f"Error al importar archivo: {str(e)}")
+        _update(jobs_db, job_id, estado='fallido', error=str(e))
+    finally:
+        terminado.set()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def get_job(job_id):
+    """Estado y avance de un trabajo de importación, como diccionario (o None)"""
+    conn = _connection(jobs_path())
+    cursor = conn.execute('SELECT * FROM import_jobs WHERE id = ?', (job_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return dict(zip([col[0] for col in cursor.description], row))
+
+def recent_jobs(limit=10):
+    """Últimos trabajos de importación, del más reciente al más antiguo"""
+    conn = _connection(jobs_path())
+    cursor = conn.execute('SELECT * FROM import_jobs ORDER BY creado DESC LIMIT ?', (limit,))
+    columns = [col[0] for col in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
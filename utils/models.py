@@ -1,14 +1,9 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime
+from sqlalchemy.orm import declarative_base, sessionmaker
 import os
+import threading
 from datetime import datetime
 
-# Configuración de la URL de la base de datos
-database_url = os.environ['DATABASE_URL']
-if database_url.startswith("postgres://"):
-    database_url = database_url.replace("postgres://", "postgresql://", 1)
-
 Base = declarative_base()
 
 class Producto(Base):
@@ -22,14 +17,34 @@ class Producto(Base):
     precio = Column(Float, nullable=False)
     fecha_actualizacion = Column(DateTime, default=datetime.utcnow)
 
-# Configuración de la base de datos
-engine = create_engine(database_url)
-SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+# Las sesiones se enlazan al motor al crearlas, así que importar este módulo
+# no lee DATABASE_URL ni abre ninguna conexión
+SessionLocal = sessionmaker(expire_on_commit=False)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """
+    Motor de los modelos, creado la primera vez que se usa: DATABASE_URL si
+    está definida y, si no, el archivo SQLite del inventario.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            database_url = os.environ.get('DATABASE_URL', '')
+            if database_url.startswith("postgres://"):
+                database_url = database_url.replace("postgres://", "postgresql://", 1)
+            if not database_url:
+                from utils import data_manager
+                database_url = f'sqlite:///{data_manager.DB_PATH}'
+            _engine = create_engine(database_url)
+        return _engine
 
 def init_db():
     """Inicializa la base de datos creando todas las tablas necesarias"""
     try:
-        Base.metadata.create_all(engine)
+        Base.metadata.create_all(get_engine())
         return True
     except Exception as e:
         print(f"Error initializing database: {e}")
@@ -40,4 +55,4 @@ def get_db():
     Crea y retorna una nueva sesión de base de datos.
     La sesión debe ser cerrada por el llamador cuando termine de usarla.
     """
-    return SessionLocal()
\ No newline at end of file
+    return SessionLocal(bind=get_engine())
@@ -0,0 +1,208 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+
+from utils import data_manager
+from utils.currency import DEFAULT_COP_USD, TASAS
+from utils.db import get_connection, transaction
+
+# Origen de las tasas: vacío para las tasas fijas, una ruta a un archivo JSON
+# o una URL http(s) que retorne el mismo formato:
+#   {"fecha": "2025-03-08", "tasas": {"COP": 3900, "EUR": 0.91, ...}}
+# Las tasas son unidades de cada moneda por 1 USD ("rates" también se acepta).
+RATES_SOURCE = os.environ.get('RATES_SOURCE', '')
+
+# Segundos que las tasas en memoria se consideran vigentes antes de pedir
+# una actualización en segundo plano
+RATES_TTL = int(os.environ.get('RATES_TTL', '3600'))
+
+REQUEST_TIMEOUT = 10
+
+# Fecha de las tasas fijas de utils.currency.TASAS
+STATIC_RATES_DATE = '2025-03-08'
+
+_cache_lock = threading.Lock()
+# attempted_at: último intento de actualización, exitoso o no; con el
+# proveedor caído se intenta una sola vez por RATES_TTL
+_cache = {'value': None, 'loaded_at': 0.0, 'attempted_at': None, 'refreshing': False}
+
+_history_lock = threading.Lock()
+_history = {}
+
+class StaticRateProvider:
+    """Tasas fijas definidas en el código"""
+
+    name = 'fijas'
+
+    def fetch(self):
+        tasas = dict(TASAS['USD'])
+        tasas['COP'] = DEFAULT_COP_USD
+        return STATIC_RATES_DATE, tasas
+
+def _parse_payload(payload):
+    tasas = payload.get('tasas') or payload.get('rates') or {}
+    tasas = {moneda.upper(): float(tasa) for moneda, tasa in tasas.items() if moneda.upper() != 'USD'}
+    if 'COP' not in tasas:
+        raise ValueError("Las tasas no incluyen COP")
+    return str(payload.get('fecha') or payload.get('date') or date.today().isoformat()), tasas
+
+class FileRateProvider:
+    """Tasas leídas de un archivo JSON local"""
+
+    name = 'archivo'
+
+    def __init__(self, path):
+        self.path = path
+
+    def fetch(self):
+        with open(self.path, encoding='utf-8') as f:
+            return _parse_payload(json.load(f))
+
+class HttpRateProvider:
+    """Tasas obtenidas de un servicio HTTP que retorna JSON"""
+
+    name = 'http'
+
+    def __init__(self, url, timeout=REQUEST_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    def fetch(self):
+        import requests
+
+        response = requests.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        return _parse_payload(response.json())
+
+def get_provider(source=None):
+    """Proveedor de tasas correspondiente al origen configurado"""
+    source = RATES_SOURCE if source is None else source
+    if not source:
+        return StaticRateProvider()
+    if source.startswith(('http://', 'https://')):
+        return HttpRateProvider(source)
+    return FileRateProvider(source)
+
+def _ensure_table(conn):
+    # La llave primaria (fecha, moneda) sirve de índice para las consultas históricas
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS exchange_rates
+        (fecha TEXT, moneda TEXT, tasa REAL, fuente TEXT, PRIMARY KEY (fecha, moneda))
+    ''')
+
+def _read_rates(conn, fecha=None):
+    """Tasas del día más reciente con registro hasta `fecha` (o el último día)"""
+    if fecha is None:
+        row = conn.execute('SELECT MAX(fecha) FROM exchange_rates').fetchone()
+    else:
+        row = conn.execute('SELECT MAX(fecha) FROM exchange_rates WHERE fecha <= ?', (fecha,)).fetchone()
+    if row is None or row[0] is None:
+        return None
+    rows = conn.execute('SELECT moneda, tasa, fuente FROM exchange_rates WHERE fecha = ?', (row[0],)).fetchall()
+    return _make_rates(row[0], {moneda: tasa for moneda, tasa, _ in rows}, rows[0][2])
+
+def _make_rates(fecha, tasas, fuente):
+    return {
+        'fecha': fecha,
+        'fuente': fuente,
+        'cop_usd': tasas['COP'],
+        'usd': {moneda: tasa for moneda, tasa in tasas.items() if moneda != 'COP'}
+    }
+
+def save_rates(fecha, tasas, fuente):
+    """Guarda en el historial las tasas de un día (reemplaza las de ese día)"""
+    with transaction(data_manager.DB_PATH) as conn:
+        _ensure_table(conn)
+        conn.execute('DELETE FROM exchange_rates WHERE fecha = ?', (fecha,))
+        conn.executemany(
+            'INSERT INTO exchange_rates (fecha, moneda, tasa, fuente) VALUES (?, ?, ?, ?)',
+            [(fecha, moneda, tasa, fuente) for moneda, tasa in tasas.items()]
+        )
+
+    with _history_lock:
+        _history.clear()
+
+def refresh_rates(provider=None):
+    """
+    Consulta el proveedor, guarda las tasas en el historial y actualiza la
+    caché en memoria. Retorna las tasas o None si no se pudieron obtener.
+    """
+    provider = provider or get_provider()
+    try:
+        fecha, tasas = provider.fetch()
+        save_rates(fecha, tasas, provider.name)
+        rates = _make_rates(fecha, tasas, provider.name)
+    except Exception as e:
+        print(f"Error al actualizar tasas de cambio: {str(e)}")
+        return None
+
+    with _cache_lock:
+        _cache['value'] = rates
+        _cache['loaded_at'] = time.monotonic()
+    return rates
+
+def _refresh_in_background():
+    try:
+        refresh_rates()
+    finally:
+        with _cache_lock:
+            _cache['refreshing'] = False
+
+def current_rates():
+    """
+    Tasas vigentes: {'fecha', 'fuente', 'cop_usd', 'usd': {moneda: tasa}}.
+
+    Nunca espera al proveedor: retorna las tasas en memoria y, si ya
+    vencieron, pide la actualización a un hilo en segundo plano (como
+    máximo una vez por RATES_TTL, aunque el intento anterior haya fallado).
+    """
+    with _cache_lock:
+        rates = _cache['value']
+        now = time.monotonic()
+        expired = now - _cache['loaded_at'] > RATES_TTL
+        attempted = _cache['attempted_at'] is not None and now - _cache['attempted_at'] <= RATES_TTL
+        start = (rates is None or expired) and not _cache['refreshing'] and not attempted
+        if start:
+            _cache['refreshing'] = True
+            _cache['attempted_at'] = now
+
+    if rates is None:
+        # Primer uso en este proceso: el último registro del historial o las tasas fijas
+        try:
+            conn = get_connection(data_manager.DB_PATH)
+            _ensure_table(conn)
+            rates = _read_rates(conn)
+        except sqlite3.Error as e:
+            print(f"Error al leer historial de tasas: {str(e)}")
+        if rates is None:
+            fecha, tasas = StaticRateProvider().fetch()
+            rates = _make_rates(fecha, tasas, StaticRateProvider.name)
+        with _cache_lock:
+            if _cache['value'] is None:
+                _cache['value'] = rates
+
+    if start:
+        threading.Thread(target=_refresh_in_background, name='rates-refresh', daemon=True).start()
+    return rates
+
+def rates_at(fecha):
+    """Tasas vigentes en una fecha (las del último día registrado hasta esa fecha)"""
+    fecha = fecha.isoformat() if isinstance(fecha, date) else str(fecha)
+    with _history_lock:
+        if fecha in _history:
+            return _history[fecha]
+
+    try:
+        conn = get_connection(data_manager.DB_PATH)
+        _ensure_table(conn)
+        rates = _read_rates(conn, fecha)
+    except sqlite3.Error as e:
+        print(f"Error al leer historial de tasas: {str(e)}")
+        return None
+
+    with _history_lock:
+        _history[fecha] = rates
+    return rates
@@ -0,0 +1,148 @@
+from collections import defaultdict
+from datetime import datetime
+
+from utils import data_manager
+from utils.db import get_connection, transaction
+
+# Categoría de las ventas de productos sin línea
+DEFAULT_CATEGORY = 'Sin categoría'
+
+SALES_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS ventas
+       (id INTEGER PRIMARY KEY, venta_id TEXT, fecha TEXT, codigo TEXT, producto TEXT,
+        categoria TEXT, cantidad INTEGER, precio REAL, total REAL)''',
+    'CREATE INDEX IF NOT EXISTS idx_ventas_fecha ON ventas(fecha)',
+    '''CREATE TRIGGER IF NOT EXISTS ventas_no_update BEFORE UPDATE ON ventas BEGIN
+           SELECT RAISE(ABORT, 'El libro de ventas no se puede modificar');
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS ventas_no_delete BEFORE DELETE ON ventas BEGIN
+           SELECT RAISE(ABORT, 'El libro de ventas no se puede modificar');
+       END''',
+    'CREATE TABLE IF NOT EXISTS ventas_diarias (fecha TEXT PRIMARY KEY, total REAL, unidades INTEGER, lineas INTEGER)',
+    'CREATE TABLE IF NOT EXISTS ventas_categoria (categoria TEXT PRIMARY KEY NOT NULL, total REAL, unidades INTEGER)',
+    'CREATE TABLE IF NOT EXISTS ventas_producto (codigo TEXT PRIMARY KEY NOT NULL, producto TEXT, total REAL, unidades INTEGER)',
+    'CREATE INDEX IF NOT EXISTS idx_ventas_producto_unidades ON ventas_producto(unidades)'
+]
+
+def ensure_sales_tables(conn):
+    """
+    Crea el libro de ventas (solo se agregan filas) y los resúmenes por día,
+    categoría y producto que se actualizan con cada venta.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ventas'"
+    ).fetchone()
+    if exists:
+        return
+
+    # Sentencias separadas (no executescript) para no confirmar la transacción en curso
+    for statement in SALES_SCHEMA:
+        conn.execute(statement)
+
+def record_sales(conn, lineas, venta_id=None, fecha=None):
+    """
+    Agrega las líneas de una venta al libro y suma sus totales a los
+    resúmenes, dentro de la transacción de `conn`.
+
+    Cada línea es un diccionario con codigo, producto, cantidad, precio y
+    opcionalmente categoria.
+    """
+    ensure_sales_tables(conn)
+    fecha = fecha or datetime.now().isoformat(timespec='seconds')
+    dia = fecha[:10]
+
+    rows = []
+    diario = [0.0, 0, 0]
+    por_categoria = defaultdict(lambda: [0.0, 0])
+    por_producto = {}
+    for linea in lineas:
+        cantidad = int(linea['cantidad'])
+        precio = float(linea['precio'])
+        total = cantidad * precio
+        categoria = linea.get('categoria')
+        if not isinstance(categoria, str) or not categoria.strip():  # None, NaN o vacía
+            categoria = DEFAULT_CATEGORY
+        codigo = str(linea['codigo'])
+        rows.append((venta_id, fecha, codigo, linea['producto'], categoria, cantidad, precio, total))
+
+        diario[0] += total
+        diario[1] += cantidad
+        diario[2] += 1
+        por_categoria[categoria][0] += total
+        por_categoria[categoria][1] += cantidad
+        acumulado = por_producto.setdefault(codigo, [linea['producto'], 0.0, 0])
+        acumulado[1] += total
+        acumulado[2] += cantidad
+
+    if not rows:
+        return 0
+
+    conn.executemany('''
+        INSERT INTO ventas (venta_id, fecha, codigo, producto, categoria, cantidad, precio, total)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+
+    # Los resúmenes se ajustan solo con los totales de esta venta
+    conn.execute('''
+        INSERT INTO ventas_diarias (fecha, total, unidades, lineas) VALUES (?, ?, ?, ?)
+        ON CONFLICT(fecha) DO UPDATE SET
+            total = total + excluded.total,
+            unidades = unidades + excluded.unidades,
+            lineas = lineas + excluded.lineas
+    ''', (dia, *diario))
+    conn.executemany('''
+        INSERT INTO ventas_categoria (categoria, total, unidades) VALUES (?, ?, ?)
+        ON CONFLICT(categoria) DO UPDATE SET
+            total = total + excluded.total,
+            unidades = unidades + excluded.unidades
+    ''', [(categoria, total, unidades) for categoria, (total, unidades) in por_categoria.items()])
+    conn.executemany('''
+        INSERT INTO ventas_producto (codigo, producto, total, unidades) VALUES (?, ?, ?, ?)
+        ON CONFLICT(codigo) DO UPDATE SET
+            producto = excluded.producto,
+            total = total + excluded.total,
+            unidades = unidades + excluded.unidades
+    ''', [(codigo, producto, total, unidades) for codigo, (producto, total, unidades) in por_producto.items()])
+    return len(rows)
+
+def register_sales(lineas, venta_id=None, fecha=None):
+    """
+    Registra ventas sin modificar el inventario (por ejemplo, ventas
+    históricas). Retorna la cantidad de líneas o False si hubo un error.
+    """
+    try:
+        with transaction(data_manager.DB_PATH) as conn:
+            return record_sales(conn, lineas, venta_id, fecha)
+    except Exception as e:
+        print(f"Error al registrar ventas: {str(e)}")
+        return False
+
+def rebuild_rollups():
+    """Recalcula los resúmenes desde el libro de ventas (solo para reparar inconsistencias)"""
+    try:
+        with transaction(data_manager.DB_PATH) as conn:
+            ensure_sales_tables(conn)
+            for table in ['ventas_diarias', 'ventas_categoria', 'ventas_producto']:
+                conn.execute(f'DELETE FROM {table}')
+            conn.execute('''
+                INSERT INTO ventas_diarias (fecha, total, unidades, lineas)
+                SELECT substr(fecha, 1, 10), SUM(total), SUM(cantidad), COUNT(*) FROM ventas GROUP BY 1
+            ''')
+            conn.execute('''
+                INSERT INTO ventas_categoria (categoria, total, unidades)
+                SELECT categoria, SUM(total), SUM(cantidad) FROM ventas GROUP BY categoria
+            ''')
+            conn.execute('''
+                INSERT INTO ventas_producto (codigo, producto, total, unidades)
+                SELECT codigo, MAX(producto), SUM(total), SUM(cantidad) FROM ventas GROUP BY codigo
+            ''')
+        return True
+    except Exception as e:
+        print(f"Error al recalcular resúmenes de ventas: {str(e)}")
+        return False
+
+def sales_connection():
+    """Conexión del hilo actual con las tablas de ventas creadas"""
+    conn = get_connection(data_manager.DB_PATH)
+    ensure_sales_tables(conn)
+    return conn
@@ -0,0 +1,256 @@
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+from utils.data_manager import get_derived
+from utils.instrumentation import timed
+
+SEARCH_COLUMNS = ['producto', 'codigo', 'referencia']
+
+# Cada campo se termina con dos caracteres de relleno para que ningún trigrama
+# que empiece en un carácter real cruce al campo siguiente. Los códigos 0-2 se
+# eliminan del texto normalizado, así que no chocan con caracteres reales.
+_END = '\x02'
+_PAD = _END * 2
+_END_CODE = 2
+
+def normalize_text(value):
+    """Convierte a minúsculas y elimina tildes y caracteres de control"""
+    if value is None or value != value:  # None o NaN
+        return ''
+    text = str(value)
+    if text.isascii():
+        text = text.lower()
+    else:
+        text = unicodedata.normalize('NFKD', text.casefold())
+        text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    if not text.isprintable():
+        text = ''.join(ch if ch.isprintable() else ' ' for ch in text)
+    return text
+
+def normalize_code(value):
+    """Normaliza un código igual que al importarlo ("02949" -> "2949")"""
+    code = normalize_text(value).strip()
+    if code.endswith('.0') and code[:-2].isdigit():
+        code = code[:-2]
+    if code.isdigit():
+        code = code.lstrip('0') or '0'
+    return code
+
+def _trigram_key(a, b, c):
+    return (a << 42) | (b << 21) | c
+
+class SearchIndex:
+    """
+    Índice de trigramas sobre producto, código y referencia.
+
+    Responde búsquedas por subcadena y por prefijo (sin distinguir mayúsculas
+    ni tildes) y retorna posiciones de fila para usar con DataFrame.iloc. Los
+    códigos exactos se resuelven con un diccionario.
+    """
+
+    @timed('search.construir_indice')
+    def __init__(self, df, columns=SEARCH_COLUMNS):
+        self.size = len(df)
+        columns = [col for col in columns if col in df.columns]
+
+        # Normalizar cada valor distinto una sola vez
+        normalized = {}
+        fields = []
+        for col in columns:
+            values = df[col].tolist()
+            fields.append([
+                normalized[v] if v in normalized else normalized.setdefault(v, normalize_text(v))
+                for v in values
+            ])
+
+        # Texto de cada fila: campos terminados con relleno
+        self._texts = [''.join(field + _PAD for field in row) for row in zip(*fields)]
+        if not columns:
+            self._texts = [''] * self.size
+
+        self._build_trigrams()
+
+        # Valores ordenados de cada campo para búsquedas por prefijo
+        self._sorted = []
+        for field in fields:
+            order = sorted(range(self.size), key=field.__getitem__)
+            self._sorted.append(([field[i] for i in order], np.array(order, dtype=np.int64)))
+
+        # Código exacto -> posiciones
+        self._codes = {}
+        if 'codigo' in columns:
+            for pos, value in enumerate(df['codigo'].tolist()):
+                self._codes.setdefault(normalize_code(value), []).append(pos)
+
+    def _build_trigrams(self):
+        """Construye la lista invertida trigrama -> filas de forma vectorizada"""
+        lengths = np.fromiter((len(text) for text in self._texts), dtype=np.int64, count=self.size)
+        joined = ''.join(self._texts)
+        codes = np.frombuffer(joined.encode('utf-32-le'), dtype='<u4').astype(np.uint64)
+        rows = np.repeat(np.arange(self.size, dtype=np.int32), lengths)
+
+        if len(codes) < 3:
+            self._keys = np.empty(0, dtype=np.uint64)
+            self._offsets = np.zeros(1, dtype=np.int64)
+            self._rows = np.empty(0, dtype=np.int32)
+            return
+
+        starts = codes[:-2] > _END_CODE
+        keys = ((codes[:-2] << 42) | (codes[1:-1] << 21) | codes[2:])[starts]
+        rows = rows[:-2][starts]
+
+        # Ordenar por (trigrama, fila) y quitar repetidos dentro de una fila
+        order = np.lexsort((rows, keys))
+        keys = keys[order]
+        rows = rows[order]
+        keep = np.ones(len(keys), dtype=bool)
+        keep[1:] = (keys[1:] != keys[:-1]) | (rows[1:] != rows[:-1])
+        keys = keys[keep]
+        rows = rows[keep]
+
+        self._keys, first = np.unique(keys, return_index=True)
+        self._offsets = np.append(first, len(keys)).astype(np.int64)
+        self._rows = rows
+
+    def _rows_in_range(self, low, high):
+        """Filas de los trigramas con clave en [low, high)"""
+        i = np.searchsorted(self._keys, np.uint64(low), side='left')
+        j = np.searchsorted(self._keys, np.uint64(high), side='left')
+        return self._rows[self._offsets[i]:self._offsets[j]]
+
+    def _substring(self, query):
+        """Posiciones (ordenadas) de las filas que contienen la consulta"""
+        points = [ord(ch) for ch in query]
+
+        # Consultas cortas: unir los trigramas que empiezan por ellas
+        if len(points) < 3:
+            low = _trigram_key(points[0], points[1] if len(points) == 2 else 0, 0)
+            width = 1 << 21 if len(points) == 2 else 1 << 42
+            hits = np.zeros(self.size, dtype=bool)
+            hits[self._rows_in_range(low, low + width)] = True
+            return np.flatnonzero(hits)
+
+        # Intersección de las listas de cada trigrama, de la más corta a la más larga
+        postings = []
+        for i in range(len(points) - 2):
+            key = _trigram_key(*points[i:i + 3])
+            postings.append(self._rows_in_range(key, key + 1))
+        postings.sort(key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+
+        if len(points) == 3:
+            return candidates.astype(np.int64)
+
+        # Los trigramas pueden aparecer separados: verificar la subcadena completa
+        texts = self._texts
+        return np.array([pos for pos in candidates if query in texts[pos]], dtype=np.int64)
+
+    def lookup_code(self, code):
+        """Posiciones de los productos cuyo código es exactamente `code`"""
+        return np.array(self._codes.get(normalize_code(code), []), dtype=np.int64)
+
+    @timed('search.buscar')
+    def search(self, query):
+        """
+        Posiciones de las filas cuyo producto, código o referencia contienen la
+        consulta. Las coincidencias exactas de código van primero.
+        """
+        query = normalize_text(query).strip()
+        if not query:
+            return np.arange(self.size, dtype=np.int64)
+
+        matches = self._substring(query)
+        exact = self.lookup_code(query)
+        if len(exact):
+            matches = np.concatenate([exact, matches[~np.isin(matches, exact)]])
+        return matches
+
+    def prefix(self, query):
+        """Posiciones (ordenadas) de las filas con algún campo que empieza por la consulta"""
+        query = normalize_text(query).strip()
+        if not query:
+            return np.arange(self.size, dtype=np.int64)
+
+        found = []
+        for values, positions in self._sorted:
+            start = bisect_left(values, query)
+            end = bisect_left(values, query + '\U0010ffff', lo=start)
+            found.append(positions[start:end])
+        return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+
+    def mask(self, query):
+        """Máscara booleana (alineada con las filas) de search(query)"""
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.search(query)] = True
+        return mask
+
+class PriceIndex:
+    """
+    Precios ordenados del inventario para consultar bandas de precio y los
+    productos más cercanos por precio con búsqueda binaria. También guarda
+    un orden por grupo para restringir la consulta a la misma línea o marca.
+    """
+
+    GROUP_COLUMNS = ['linea', 'nomb_marca']
+
+    @timed('search.construir_indice_precios')
+    def __init__(self, df):
+        self.size = len(df)
+        precios = df['precio'].to_numpy(dtype=float)
+        order = np.argsort(precios, kind='stable')
+        self._all = (precios[order], order)
+
+        # Por cada columna de grupo: valor -> (precios ordenados, posiciones)
+        self._groups = {}
+        for col in self.GROUP_COLUMNS:
+            if col not in df.columns:
+                continue
+            codes, values = pd.factorize(df[col])
+            valid = codes >= 0
+            group_order = np.lexsort((precios, codes))
+            group_order = group_order[valid[group_order]]
+            sorted_codes = codes[group_order]
+            bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+            groups = {}
+            for chunk in np.split(group_order, bounds):
+                if len(chunk):
+                    groups[values[codes[chunk[0]]]] = (precios[chunk], chunk)
+            self._groups[col] = groups
+
+    def _arrays(self, columna=None, valor=None):
+        if columna is None:
+            return self._all
+        empty = (np.empty(0), np.empty(0, dtype=np.int64))
+        return self._groups.get(columna, {}).get(valor, empty)
+
+    def band(self, precio_min, precio_max, columna=None, valor=None):
+        """Posiciones (ordenadas por precio) con precio entre precio_min y precio_max"""
+        precios, positions = self._arrays(columna, valor)
+        start = np.searchsorted(precios, precio_min, side='left')
+        end = np.searchsorted(precios, precio_max, side='right')
+        return positions[start:end]
+
+    def nearest(self, precio, k, columna=None, valor=None):
+        """Posiciones de los k productos con precio más cercano, del más cercano al más lejano"""
+        precios, positions = self._arrays(columna, valor)
+        center = np.searchsorted(precios, precio)
+        start = max(center - k, 0)
+        end = min(center + k, len(precios))
+        window = np.abs(precios[start:end] - precio)
+        closest = np.argsort(window, kind='stable')[:k]
+        return positions[start:end][closest]
+
+def get_price_index(df=None):
+    """Índice de precios del inventario, reconstruido solo cuando cambian los datos"""
+    return get_derived('price_index', PriceIndex, df)
+
+def get_search_index(df=None):
+    """Índice de búsqueda del inventario, reconstruido solo cuando cambian los datos"""
+    return get_derived('search_index', SearchIndex, df)
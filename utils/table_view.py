@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data_manager import LOW_STOCK
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+STOCK_STYLES = {
+    'agotado': 'background-color: #ffebee; color: #c62828',
+    'bajo': 'background-color: #fff3e0; color: #ef6c00',
+    '': ''
+}
+
+def stock_levels(cantidades):
+    """Nivel de stock de cada fila ('agotado', 'bajo' o '') calculado de forma vectorizada"""
+    cantidades = np.asarray(cantidades)
+    return np.select(
+        [cantidades <= 0, cantidades < LOW_STOCK],
+        ['agotado', 'bajo'],
+        default=''
+    )
+
+def style_stock(df):
+    """Resalta las filas agotadas o con stock bajo; pensado para la página visible"""
+    css = pd.Series(stock_levels(df['cantidad'])).map(STOCK_STYLES).to_numpy(dtype=object)
+    styles = np.repeat(css[:, None], len(df.columns), axis=1)
+    return df.style.apply(lambda _: pd.DataFrame(styles, index=df.index, columns=df.columns), axis=None)
+
+def paginate(df, page, page_size, sort_by=None, ascending=True):
+    """Retorna solo las filas de la página indicada (empezando en 1)"""
+    if sort_by in df.columns:
+        df = df.sort_values(sort_by, ascending=ascending, kind='stable')
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size]
+
+def pagination_controls(total_rows, key, sort_columns, labels=None):
+    """
+    Controles de paginación (tamaño de página, orden y número de página).
+    Retorna un diccionario con page, page_size, sort_by y ascending.
+    """
+    labels = labels or {}
+    col1, col2, col3, col4 = st.columns([1, 2, 1, 1])
+
+    with col1:
+        page_size = st.selectbox("Filas por página", PAGE_SIZES, key=f"{key}_page_size")
+    with col2:
+        sort_by = st.selectbox(
+            "Ordenar por",
+            [None] + list(sort_columns),
+            format_func=lambda col: "Sin orden" if col is None else labels.get(col, col),
+            key=f"{key}_sort_by"
+        )
+    with col3:
+        ascending = st.selectbox(
+            "Dirección",
+            [True, False],
+            format_func=lambda asc: "Ascendente" if asc else "Descendente",
+            key=f"{key}_ascending"
+        )
+
+    total_pages = max(1, -(-total_rows // page_size))
+    with col4:
+        page = st.number_input(
+            f"Página (de {total_pages})",
+            min_value=1,
+            max_value=total_pages,
+            value=1,
+            step=1,
+            key=f"{key}_page"
+        )
+
+    return {
+        'page': int(min(page, total_pages)),
+        'page_size': page_size,
+        'sort_by': sort_by,
+        'ascending': ascending
+    }
@@ -0,0 +1,155 @@
+import base64
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from functools import lru_cache
+
+from utils import data_manager
+from utils.db import get_connection, transaction
+from utils.images import make_thumbnail
+
+# Tamaño de las miniaturas de producto
+THUMBNAIL_SIZE = (128, 128)
+
+# Por debajo de este número de imágenes no vale la pena iniciar procesos
+PARALLEL_THRESHOLD = 8
+
+_index_lock = threading.Lock()
+_index = {'key': None, 'hashes': {}}
+
+def thumbnail_dir():
+    """Directorio de las miniaturas, junto a la base de datos"""
+    return os.path.join(os.path.dirname(os.path.abspath(data_manager.DB_PATH)), 'thumbnails')
+
+def _thumbnail_path(sha256, base_dir=None):
+    # Direccionado por contenido: la misma imagen se guarda una sola vez
+    return os.path.join(base_dir or thumbnail_dir(), sha256[:2], sha256 + '.jpg')
+
+def _ensure_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS product_images
+        (codigo TEXT PRIMARY KEY, sha256 TEXT NOT NULL, ancho INTEGER, alto INTEGER, actualizado TEXT)
+    ''')
+
+def _process_image(task):
+    """
+    Genera la miniatura de una imagen (se ejecuta en un proceso aparte).
+    Retorna (codigo, sha256, ancho, alto) o (codigo, None, error, None).
+    """
+    codigo, source, base_dir = task
+    try:
+        if isinstance(source, (bytes, bytearray)):
+            content = bytes(source)
+        else:
+            with open(source, 'rb') as f:
+                content = f.read()
+
+        sha256 = hashlib.sha256(content).hexdigest()
+        path = _thumbnail_path(sha256, base_dir)
+        if not os.path.exists(path):
+            data = make_thumbnail(content, THUMBNAIL_SIZE)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Escribir en un archivo temporal y renombrar, para no dejar miniaturas a medias
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        from PIL import Image
+        with Image.open(path) as img:
+            ancho, alto = img.size
+        return codigo, sha256, ancho, alto
+    except Exception as e:
+        return codigo, None, str(e), None
+
+def attach_images(items, max_workers=None):
+    """
+    Asocia imágenes a productos. `items` es una lista de (codigo, origen),
+    donde origen es la ruta de la imagen o su contenido en bytes. Las
+    miniaturas se generan en un pool de procesos.
+
+    Retorna un diccionario con la cantidad de imágenes asociadas y los errores.
+    """
+    base_dir = thumbnail_dir()
+    tasks = [(str(codigo), source, base_dir) for codigo, source in items]
+
+    if len(tasks) < PARALLEL_THRESHOLD:
+        results = [_process_image(task) for task in tasks]
+    else:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # spawn y no fork: el servidor de Streamlit tiene varios hilos y un
+        # proceso creado con fork puede heredar un bloqueo tomado por otro hilo
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+            results = list(executor.map(_process_image, tasks, chunksize=16))
+
+    ok = [result for result in results if result[1] is not None]
+    errores = [(result[0], result[2]) for result in results if result[1] is None]
+    for codigo, error in errores:
+        print(f"Error al generar miniatura de {codigo}: {error}")
+
+    now = datetime.now().isoformat(timespec='seconds')
+    data_manager.initialize_database()
+    with transaction(data_manager.DB_PATH) as conn:
+        _ensure_table(conn)
+        conn.executemany(
+            'INSERT OR REPLACE INTO product_images (codigo, sha256, ancho, alto, actualizado) VALUES (?, ?, ?, ?, ?)',
+            [(codigo, sha256, ancho, alto, now) for codigo, sha256, ancho, alto in ok]
+        )
+        # Versión de las imágenes: cambia aunque se reemplace una imagen en el mismo segundo
+        conn.execute('''
+            INSERT INTO inventory_meta (clave, valor) VALUES ('images_version', '1')
+            ON CONFLICT(clave) DO UPDATE SET valor = CAST(valor AS INTEGER) + 1
+        ''')
+
+    return {'asociadas': len(ok), 'errores': len(errores)}
+
+def _thumbnail_hashes():
+    """Código -> sha256 de la miniatura; se recarga solo si cambió la versión de las imágenes"""
+    try:
+        conn = get_connection(data_manager.DB_PATH)
+        row = conn.execute("SELECT valor FROM inventory_meta WHERE clave = 'images_version'").fetchone()
+        key = (data_manager.DB_PATH, row[0] if row else None)
+        with _index_lock:
+            if _index['key'] != key:
+                _index['hashes'] = dict(conn.execute('SELECT codigo, sha256 FROM product_images'))
+                _index['key'] = key
+            return _index['hashes']
+    except sqlite3.Error:
+        return {}
+
+def get_thumbnail_path(codigo):
+    """Ruta de la miniatura del producto, o None si no tiene"""
+    sha256 = _thumbnail_hashes().get(str(codigo))
+    if sha256 is None:
+        return None
+    path = _thumbnail_path(sha256)
+    return path if os.path.exists(path) else None
+
+@lru_cache(maxsize=4096)
+def _data_uri(path):
+    with open(path, 'rb') as f:
+        return 'data:image/jpeg;base64,' + base64.b64encode(f.read()).decode('ascii')
+
+def thumbnail_uris(codigos):
+    """
+    Miniaturas de varios productos como data URI (para ImageColumn), en el
+    mismo orden de `codigos`; None para los productos sin imagen.
+    """
+    hashes = _thumbnail_hashes()
+    uris = []
+    for codigo in codigos:
+        sha256 = hashes.get(str(codigo))
+        try:
+            uris.append(_data_uri(_thumbnail_path(sha256)) if sha256 else None)
+        except OSError:
+            uris.append(None)
+    return uris
+
+def has_thumbnails():
+    """Indica si algún producto tiene miniatura"""
+    return bool(_thumbnail_hashes())